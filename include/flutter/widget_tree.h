@@ -221,6 +221,37 @@ public:
         return j;
     }
 
+    /**
+     * @brief Format tree as JSON with each node cut down to the given fields
+     * @param fields Node keys to keep (e.g. {"type"}); empty keeps every key.
+     *        Names a node doesn't have are skipped, so unknown names add nothing.
+     */
+    nlohmann::json toJson(const std::vector<std::string>& fields) const {
+        if (fields.empty()) {
+            return toJson();
+        }
+
+        nlohmann::json j = {
+            {"root_id", root_id_},
+            {"node_count", nodes_.size()},
+            {"nodes", nlohmann::json::array()}
+        };
+
+        for (const auto& [id, node] : nodes_) {
+            nlohmann::json full = node.toJson();
+            nlohmann::json slim = nlohmann::json::object();
+            for (const auto& field : fields) {
+                auto it = full.find(field);
+                if (it != full.end()) {
+                    slim[field] = std::move(*it);
+                }
+            }
+            j["nodes"].push_back(std::move(slim));
+        }
+
+        return j;
+    }
+
     /**
      * @brief Clear the tree
      */
@@ -4,6 +4,7 @@
 #include <functional>
 #include <unordered_map>
 #include <memory>
+#include <optional>
 
 namespace jsonrpc {
 
@@ -49,8 +50,8 @@ public:
 
     /**
      * @brief Handle a raw JSON-RPC message string
-     * @param message JSON string containing request
-     * @return Response as JSON string
+     * @param message JSON string containing a request or a batch (array) of requests
+     * @return Response as JSON string (an array for batches, empty if nothing to reply)
      */
     std::string handleMessage(const std::string& message);
 
@@ -60,6 +61,18 @@ public:
     std::vector<std::string> getRegisteredMethods() const;
 
 private:
+    /**
+     * @brief Handle one parsed request or notification
+     * @return Response, or std::nullopt for notifications
+     */
+    std::optional<Response> handleJson(const nlohmann::json& message);
+
+    /**
+     * @brief Handle a JSON-RPC batch, running entries in order
+     * @return Array of responses as JSON string (empty if all were notifications)
+     */
+    std::string handleBatch(const nlohmann::json& batch);
+
     std::unordered_map<std::string, MethodHandler> methods_;
 };
 
@@ -5,8 +5,12 @@ echo ========================================
 echo.
 
 REM Run pytest tests
+REM Extra arguments are passed through, e.g. "run_tests.bat -n 4 --dist loadgroup"
+REM with pytest-xdist: each worker gets its own MCP pool; tests that drive the Flutter
+REM app share one worker (xdist_group "flutter_app"), since workers can't each build it
+REM "run_tests.bat --reuse-app" leaves the Flutter app running for the next run
 echo Running pytest tests...
-pytest tests/ -v --tb=short
+pytest tests/ -v --tb=short %*
 
 if %ERRORLEVEL% NEQ 0 (
     echo.
@@ -47,12 +47,10 @@ Response MessageHandler::handleRequest(const Request& request) {
     }
 }
 
-std::string MessageHandler::handleMessage(const std::string& message) {
-    spdlog::debug("Received message: {}", message);
-
+std::optional<Response> MessageHandler::handleJson(const nlohmann::json& message) {
     try {
         // Parse request
-        auto request = Request::parse(message);
+        auto request = Request::fromJson(message);
 
         // If it's a notification (no ID), don't send a response
         if (!request.hasId()) {
@@ -67,24 +65,81 @@ std::string MessageHandler::handleMessage(const std::string& message) {
                                request.method, e.what());
                 }
             }
-            return "";  // No response for notifications
+            return std::nullopt;  // No response for notifications
         }
 
         // Handle request and return response
-        auto response = handleRequest(request);
-        auto response_str = response.serialize();
-        spdlog::debug("Sending response: {}", response_str);
-        return response_str;
+        return handleRequest(request);
 
+    } catch (const std::exception& e) {
+        // Valid JSON but not a valid Request object (e.g. a bare number in a batch)
+        spdlog::error("Invalid JSON-RPC request: {}", e.what());
+        return Response::errorResponse(
+            Error::fromCode(ErrorCode::InvalidRequest,
+                          std::string("Invalid JSON-RPC request: ") + e.what()),
+            nullptr
+        );
+    }
+}
+
+std::string MessageHandler::handleBatch(const nlohmann::json& batch) {
+    if (batch.empty()) {
+        return Response::errorResponse(
+            Error::fromCode(ErrorCode::InvalidRequest, "Empty batch"),
+            nullptr
+        ).serialize();
+    }
+
+    spdlog::debug("Handling batch of {} messages", batch.size());
+
+    // Entries run in order, so a batch behaves like the same requests sent one by one
+    nlohmann::json responses = nlohmann::json::array();
+    for (const auto& message : batch) {
+        auto response = handleJson(message);
+        if (response) {
+            responses.push_back(response->toJson());
+        }
+    }
+
+    // A batch of notifications gets no response at all
+    if (responses.empty()) {
+        return "";
+    }
+
+    auto response_str = responses.dump();
+    spdlog::debug("Sending batch response: {}", response_str);
+    return response_str;
+}
+
+std::string MessageHandler::handleMessage(const std::string& message) {
+    spdlog::debug("Received message: {}", message);
+
+    nlohmann::json parsed;
+    try {
+        parsed = nlohmann::json::parse(message);
     } catch (const std::exception& e) {
         // Parse error
         spdlog::error("Failed to parse message: {}", e.what());
         auto error_response = Response::errorResponse(
-            Error::fromCode(ErrorCode::ParseError, e.what()),
+            Error::fromCode(ErrorCode::ParseError,
+                          std::string("Failed to parse JSON-RPC request: ") + e.what()),
             nullptr
         );
         return error_response.serialize();
     }
+
+    if (parsed.is_array()) {
+        return handleBatch(parsed);
+    }
+
+    auto response = handleJson(parsed);
+    if (!response) {
+        return "";
+    }
+
+    auto response_str = response->serialize();
+    spdlog::debug("Sending response: {}", response_str);
+    return response_str;
 }
 
 std::vector<std::string> MessageHandler::getRegisteredMethods() const {
@@ -149,7 +149,8 @@ void print_usage(const char* program_name) {
               << "    Use Case: Inspect app structure, locate widgets, verify UI hierarchy\n"
               << "    Parameters:\n"
               << "      --max-depth <int>         Maximum tree depth (default: unlimited)\n"
-              << "      --format <text|json>      Output format (default: text)\n"
+              << "      --format <fmt>            Output format: text, json, or summary\n"
+              << "                                (node count only) (default: text)\n"
               << "    \n"
               << "    Example: get_tree --max-depth 5 --format json\n"
               << "  ---\n\n"
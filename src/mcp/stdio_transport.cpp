@@ -37,8 +37,8 @@ void StdioTransport::send(const std::string& message) {
     }
 
     try {
-        // Write message followed by newline (message framing)
-        std::cout << message << std::endl;
+        // Write message followed by newline (message framing), flushed once
+        std::cout << message << '\n';
         std::cout.flush();
 
         spdlog::debug("Sent message via STDIO: {} bytes", message.size());
@@ -58,8 +58,8 @@ std::string StdioTransport::receive() {
     try {
         std::string line;
         if (std::getline(std::cin, line)) {
-            // Remove any trailing whitespace
-            while (!line.empty() && (line.back() == '\r' || line.back() == '\n')) {
+            // getline already consumed the '\n'; only a CRLF client leaves a '\r'
+            if (!line.empty() && line.back() == '\r') {
                 line.pop_back();
             }
 
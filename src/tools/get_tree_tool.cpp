@@ -43,9 +43,15 @@ public:
             {"format", {
                 {"type", "string"},
                 {"description", "Output format: 'text' for human-readable tree, 'json' for structured data, "
-                                "'both' for both formats (default: 'text')"},
-                {"enum", nlohmann::json::array({"text", "json", "both"})},
+                                "'both' for both formats, 'summary' for node count only (default: 'text')"},
+                {"enum", nlohmann::json::array({"text", "json", "both", "summary"})},
                 {"default", "text"}
+            }},
+            {"fields", {
+                {"type", "array"},
+                {"items", {{"type", "string"}}},
+                {"description", "Node fields to include in JSON output, e.g. ['type'] when only counting "
+                                "widget types (default: all fields). Ignored for 'text' and 'summary'."}
             }}
         };
         return schema;
@@ -67,6 +73,7 @@ public:
             // Get parameters
             int max_depth = getParamOr<int>(arguments, "max_depth", 10);
             std::string format = getParamOr<std::string>(arguments, "format", "text");
+            auto fields = getParamOr<std::vector<std::string>>(arguments, "fields", {});
 
             // Validate max_depth
             if (max_depth < 0 || max_depth > 100) {
@@ -76,9 +83,9 @@ public:
             }
 
             // Validate format
-            if (format != "text" && format != "json" && format != "both") {
+            if (format != "text" && format != "json" && format != "both" && format != "summary") {
                 return createErrorResponse(
-                    "Invalid format. Must be 'text', 'json', or 'both'."
+                    "Invalid format. Must be 'text', 'json', 'both', or 'summary'."
                 );
             }
 
@@ -107,6 +114,16 @@ public:
 
             spdlog::info("Extracted widget tree: {} widgets", tree.getNodeCount());
 
+            // Summary skips formatting entirely (cheap liveness/size check)
+            if (format == "summary") {
+                return createSuccessResponse({
+                    {"format", "summary"},
+                    {"root_id", tree.getRootId()},
+                    {"node_count", tree.getNodeCount()},
+                    {"max_depth", max_depth}
+                }, "Widget tree extracted successfully");
+            }
+
             // Format output based on requested format
             std::string output_text;
 
@@ -118,7 +135,7 @@ public:
                 // JSON only
                 return createSuccessResponse({
                     {"format", "json"},
-                    {"widget_tree", tree.toJson()},
+                    {"widget_tree", tree.toJson(fields)},
                     {"node_count", tree.getNodeCount()},
                     {"max_depth", max_depth}
                 }, "Widget tree extracted successfully");
@@ -129,7 +146,7 @@ public:
                 return createSuccessResponse({
                     {"format", "both"},
                     {"text", output_text},
-                    {"json", tree.toJson()},
+                    {"json", tree.toJson(fields)},
                     {"node_count", tree.getNodeCount()},
                     {"max_depth", max_depth}
                 }, "Widget tree extracted successfully");
@@ -8,14 +8,51 @@ Auto-spawns Flutter sample app if not running.
 """
 import pytest
 import subprocess
+import itertools
+import hashlib
 import json
 import os
+import queue
+import re
+import shutil
 import sys
 import threading
-import queue
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 import time
 import socket
 import signal
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import SimpleNamespace
+
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json is just slower
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+
+def _request_template(method, params):
+    """Pre-encode a constant JSON-RPC request; only the id is filled in per send"""
+    body = _dumps({"jsonrpc": "2.0", "method": method, "params": params})
+    return body[:-1].replace(b'%', b'%%') + b',"id":%d}\n'
+
+
+_INITIALIZE_REQUEST = _request_template("initialize", {
+    "protocolVersion": "2024-11-05",
+    "clientInfo": {"name": "pytest", "version": "1.0"},
+    "capabilities": {}
+})
+_TOOLS_LIST_REQUEST = _request_template("tools/list", {})
+
 
 # Configuration
 MCP_TIMEOUT = 5.0  # seconds - max time for any tool call (includes network overhead)
@@ -24,8 +61,30 @@ UI_SETTLE_TIME = 1.0  # seconds - wait after UI interaction before checking stat
 FLUTTER_APP_PORT = 8181
 FLUTTER_APP_URI = f"ws://127.0.0.1:{FLUTTER_APP_PORT}/ws"
 FLUTTER_APP_STARTUP_TIMEOUT = 90  # seconds to wait for app to start
+MCP_PIPE_BUFFER = 64 * 1024  # bytes - user-space buffer for the MCP stdio pipes
+PORT_PROBE_TTL = 0.2  # seconds - how long a successful port probe is trusted
+
+# "A Dart VM Service on Windows is available at: http://127.0.0.1:8181/..."
+# "Debug service listening on ws://127.0.0.1:8181/ws"
+VM_SERVICE_MARKER = re.compile(r'(?:VM Service|listening on).*?((?:https?|wss?)://[\w.\-]+:(\d+)\S*)')
+
+# get_tree arguments for captures that only need widget types (counts, type sets)
+TREE_TYPES_ONLY = {"format": "json", "fields": ["type"]}
 
+# get_tree arguments for captures the widget helpers read (they find no
+# widgets in the default text format)
+TREE_JSON = {"format": "json"}
 
+# Tool arguments shared by many tests. The client only reads argument dicts,
+# so one instance can serve every call.
+CHECKBOX = {"selector": "Checkbox"}
+ADD_BUTTON = {"selector": "ElevatedButton"}
+
+# Tool payloads report failure as {"success": false, "error": ...}
+CONTENT_ERROR_MARKER = re.compile(r'"error"|"success"\s*:\s*false', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
 def find_executable():
     """Find flutter_reflect.exe in common locations"""
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -35,41 +94,116 @@ def find_executable():
         os.environ.get('FLUTTER_REFLECT_EXE', ''),
     ]
     for loc in locations:
-        if loc and os.path.exists(loc):
+        if loc and os.path.isfile(loc):
             return loc
     return None
 
 
+@lru_cache(maxsize=1)
+def find_flutter_cli():
+    """Resolve the flutter CLI (flutter.bat on Windows) to an absolute path"""
+    return shutil.which('flutter')
+
+
+@lru_cache(maxsize=1)
 def find_flutter_sample_app():
     """Find the Flutter sample app directory"""
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sample_app = os.path.join(base_dir, 'examples', 'flutter_sample_app')
-    if os.path.exists(sample_app):
+    if os.path.isdir(sample_app):
         return sample_app
     return None
 
 
+# port -> monotonic time of the last successful probe
+_port_seen_up = {}
+
+
 def is_flutter_app_running(port=FLUTTER_APP_PORT):
     """Check if Flutter app is running on the specified port"""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(1)
+    now = time.monotonic()
+    if now - _port_seen_up.get(port, float('-inf')) < PORT_PROBE_TTL:
+        return True
     try:
-        result = sock.connect_ex(('127.0.0.1', port))
-        return result == 0
-    except Exception:
+        with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+            _port_seen_up[port] = now
+            return True
+    except OSError:
+        _port_seen_up.pop(port, None)
         return False
+
+
+def spawn_mcp_process(mcp_executable):
+    """Start the MCP server process, speaking JSON-RPC over its stdio pipes"""
+    log_path = os.environ.get('FLUTTER_REFLECT_STDERR_LOG')
+    stderr = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+    try:
+        return subprocess.Popen(
+            [mcp_executable],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            bufsize=MCP_PIPE_BUFFER
+        )
     finally:
-        sock.close()
+        if log_path:
+            stderr.close()  # the child holds its own handle
+
+
+def stop_process(proc, timeout=3):
+    """Stop a subprocess without ever blocking indefinitely"""
+    if proc.stdin:
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    proc.terminate()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+
+    if proc.stdout:
+        try:
+            proc.stdout.close()
+        except OSError:
+            pass
+
+
+def read_line(stream, timeout=MCP_TIMEOUT):
+    """Read one line from a pipe, raising TimeoutError after `timeout` seconds"""
+    line = Future()
+
+    def reader():
+        try:
+            line.set_result(stream.readline())
+        except (OSError, ValueError) as exc:
+            line.set_exception(exc)
+
+    threading.Thread(target=reader, daemon=True).start()
+    try:
+        return line.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"No response line within {timeout:.1f}s") from None
 
 
 class FlutterAppManager:
     """Manages Flutter app lifecycle for testing"""
 
-    def __init__(self, project_path, port=FLUTTER_APP_PORT):
+    def __init__(self, project_path, port=FLUTTER_APP_PORT, keep_running=False):
         self.project_path = project_path
         self.port = port
+        # Leave a spawned app running at session end so the next run reuses it
+        self.keep_running = keep_running
         self.process = None
         self._spawned = False
+        self._ready = threading.Event()
+        self.vm_service_uri = None
 
     def is_running(self):
         """Check if app is running"""
@@ -84,7 +218,24 @@ class FlutterAppManager:
         print(f"\n  Spawning Flutter app from: {self.project_path}")
         print(f"  Target port: {self.port}")
 
-        cmd = f'flutter run -d windows --vm-service-port={self.port} --disable-service-auth-codes'
+        flutter = find_flutter_cli()
+        if not flutter:
+            print(f"  ERROR: flutter CLI not found on PATH")
+            return False
+
+        # argv list, no shell: avoids an extra cmd.exe between us and flutter
+        args = [flutter, 'run', '-d', 'windows',
+                f'--vm-service-port={self.port}', '--disable-service-auth-codes']
+
+        # An app that outlives the session can't write into a pipe nobody
+        # reads: its output goes straight to the app log (if any) instead
+        log_path = os.environ.get('FLUTTER_REFLECT_APP_LOG')
+        if not self.keep_running:
+            output = subprocess.PIPE
+        elif log_path:
+            output = open(log_path, 'a', encoding='utf-8')
+        else:
+            output = subprocess.DEVNULL
 
         try:
             creation_flags = 0
@@ -92,46 +243,85 @@ class FlutterAppManager:
                 creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
 
             self.process = subprocess.Popen(
-                cmd,
+                args,
                 cwd=self.project_path,
-                stdout=subprocess.PIPE,
+                stdout=output,
                 stderr=subprocess.STDOUT,
                 text=True,
-                shell=True,
-                creationflags=creation_flags
+                creationflags=creation_flags,
+                start_new_session=self.keep_running and sys.platform != 'win32'
             )
 
-            print(f"  Flutter process started (PID: {self.process.pid})")
+            print(f"  Flutter process started (PID: {self.process.pid})", flush=True)
             self._spawned = True
 
+            # Keep the pipe drained so flutter never blocks on a full stdout,
+            # and pick up the VM service banner as soon as it is printed
+            # (without a pipe, readiness falls back to probing the port)
+            self._ready.clear()
+            if output is subprocess.PIPE:
+                threading.Thread(target=self._drain_output, daemon=True).start()
+
             # Wait for app to be ready
             return self._wait_for_ready(timeout)
 
         except Exception as e:
             print(f"  ERROR: Failed to spawn Flutter app: {e}")
             return False
+        finally:
+            if log_path and self.keep_running:
+                output.close()  # the child holds its own handle
+
+    def _drain_output(self):
+        """Read flutter output until EOF, flagging readiness on the VM service banner
+
+        Output is discarded unless FLUTTER_REFLECT_APP_LOG names a file to
+        append it to.
+        """
+        log_path = os.environ.get('FLUTTER_REFLECT_APP_LOG')
+        log = open(log_path, 'a', encoding='utf-8') if log_path else None
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                if log:
+                    log.write(line)
+                if self._ready.is_set():
+                    continue
+                match = VM_SERVICE_MARKER.search(line)
+                if match and int(match.group(2)) == self.port:
+                    self.vm_service_uri = match.group(1)
+                    self._ready.set()
+        except (OSError, ValueError):
+            pass  # pipe closed during terminate
+        finally:
+            if log:
+                log.close()
 
     def _wait_for_ready(self, timeout):
         """Wait for app to be ready"""
-        print(f"  Waiting for VM Service to be ready...")
-        start = time.time()
+        print(f"  Waiting for VM Service to be ready...", flush=True)
+        start = time.monotonic()
+        delay = 0.05  # poll quickly at first, backing off to once a second
 
-        while time.time() - start < timeout:
-            elapsed = int(time.time() - start)
+        while time.monotonic() - start < timeout:
+            elapsed = int(time.monotonic() - start)
 
             # Check if process died
             if self.process and self.process.poll() is not None:
                 print(f"  ERROR: Flutter process exited with code {self.process.returncode}")
                 return False
 
-            # Check if port is open
+            if self._ready.is_set():
+                print(f"  Flutter app ready at {self.vm_service_uri} (took {elapsed}s)")
+                return True
+
+            # Check if port is open (banner may be suppressed or reworded);
+            # an accepted connect means the VM service is listening
             if self.is_running():
-                time.sleep(2)  # Give it a moment to fully initialize
-                if self.is_running():
-                    print(f"  Flutter app ready on port {self.port} (took {elapsed}s)")
-                    return True
+                print(f"  Flutter app ready on port {self.port} (took {elapsed}s)")
+                return True
 
-            time.sleep(1)
+            self._ready.wait(delay)
+            delay = min(delay * 2, 1.0)
 
         print(f"  ERROR: Timeout waiting for Flutter app to start")
         return False
@@ -141,7 +331,12 @@ class FlutterAppManager:
         if not self._spawned or not self.process:
             return
 
-        print(f"\n  Terminating Flutter app (PID: {self.process.pid})...")
+        if self.keep_running and self.is_running():
+            print(f"\n  Leaving Flutter app running on port {self.port} (PID: {self.process.pid}) for reuse")
+            self._spawned = False
+            return
+
+        print(f"\n  Terminating Flutter app (PID: {self.process.pid})...", flush=True)
 
         try:
             if sys.platform == 'win32':
@@ -153,9 +348,28 @@ class FlutterAppManager:
             print("  Flutter app terminated")
         except subprocess.TimeoutExpired:
             print("  Force killing Flutter app...")
-            self.process.kill()
+            self._kill_tree()
         except Exception as e:
             print(f"  Error terminating Flutter app: {e}")
+        finally:
+            self._spawned = False
+
+    def _kill_tree(self):
+        """Force-kill flutter and everything it started, then reap it"""
+        if sys.platform == 'win32':
+            # flutter resolves to flutter.bat, so kill() alone would only end
+            # the cmd.exe running it and orphan the dart tool and the app
+            subprocess.run(
+                ['taskkill', '/T', '/F', '/PID', str(self.process.pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        else:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            print(f"  WARNING: Flutter process {self.process.pid} did not exit")
 
 
 class MCPClient:
@@ -163,36 +377,139 @@ class MCPClient:
 
     def __init__(self, proc):
         self.proc = proc
-        self.request_id = 0
+        self._next_id = itertools.count(1).__next__  # thread-safe id allocation
         self._initialized = False
+        # False only while the server is known to hold no VM service
+        # connection (new process, or after disconnect)
+        self.connected = False
+
+        # One reader thread per process; responses resolve futures keyed by id
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stdin = getattr(proc.stdin, 'raw', proc.stdin)
+        self._eof = False
+        self._reader = threading.Thread(target=self._reader_loop, daemon=True)
+        self._reader.start()
+
+    def _reader_loop(self):
+        """Read response lines until EOF and resolve the matching futures
+
+        Takes whatever the pipe has (up to a buffer's worth) per read and cuts
+        lines out of a rolling buffer, so a large tree response arrives in a
+        few big reads rather than readline refilling one buffer at a time.
+        """
+        buf = bytearray()
+        try:
+            while True:
+                chunk = self.proc.stdout.read1(MCP_PIPE_BUFFER)
+                if not chunk:
+                    break
+                buf += chunk
+                if b'\n' not in chunk:
+                    continue
+                *lines, buf = buf.split(b'\n')
+                for line in lines:
+                    try:
+                        self._dispatch(_loads(line))
+                    except (ValueError, TypeError):
+                        continue  # not JSON, or not a response we can route
+        except (OSError, ValueError):
+            pass  # stdout closed underneath us
+
+        # Server went away: release everyone still waiting
+        with self._pending_lock:
+            self._eof = True
+            futures = {entry[0] for entry in self._pending.values()}
+            self._pending.clear()
+        for future in futures:
+            self._resolve(future, None)
+
+    @staticmethod
+    def _resolve(future, value):
+        """Complete a response future unless its caller already gave up on it"""
+        try:
+            future.set_result(value)
+        except InvalidStateError:
+            pass  # cancelled after a timeout
+
+    def _dispatch(self, message):
+        """Resolve the future waiting on a response (or batch response array)"""
+        if isinstance(message, list):
+            ids = [m.get('id') for m in message if isinstance(m, dict)]
+        elif isinstance(message, dict):
+            ids = [message.get('id')]
+        else:
+            return
+
+        with self._pending_lock:
+            entries = [self._pending.pop(i, None) for i in ids]
+
+        entry = next((e for e in entries if e is not None), None)
+        if entry is None:
+            return
+
+        future, tool_name, start_time = entry
+        if tool_name and isinstance(message, dict):
+            # Add timing info to response
+            message['_elapsed'] = time.perf_counter() - start_time
+            message['_tool'] = tool_name
+            if tool_name in ('connect', 'disconnect'):
+                self._track_connection(tool_name, message)
+        self._resolve(future, message)
+
+    def _send_async(self, request, tool_name=None):
+        """Send request (or batch of requests) and return a Future for the response"""
+        ids = [r['id'] for r in request] if isinstance(request, list) else [request['id']]
+        return self._send_payload(ids, _dumps(request) + b'\n', tool_name)
+
+    def _send_payload(self, ids, payload, tool_name=None):
+        """Write an encoded request line and return a Future for the response to ids"""
+        future = Future()
+        entry = (future, tool_name, time.perf_counter())
+
+        with self._pending_lock:
+            if self._eof:
+                future.set_result(None)
+                return future
+            for request_id in ids:
+                self._pending[request_id] = entry
+
+        # A caller that times out cancels the future; drop its ids so a late
+        # response is discarded instead of resolving a future nobody awaits
+        future.add_done_callback(lambda f: f.cancelled() and self._forget(ids))
+
+        # Send request as one bytes payload straight to the raw pipe: a single
+        # write syscall, with no copy through the buffered writer or flush
+        view = memoryview(payload)
+        with self._write_lock:
+            while view:
+                view = view[self._stdin.write(view):]
+
+        return future
+
+    def _forget(self, ids):
+        """Stop tracking request ids whose caller has given up"""
+        with self._pending_lock:
+            for request_id in ids:
+                self._pending.pop(request_id, None)
 
     def _send_receive(self, request, timeout=MCP_TIMEOUT):
-        """Send request and receive response with timeout"""
-        def read_response(proc, q):
-            try:
-                line = proc.stdout.readline()
-                if line:
-                    q.put(json.loads(line.strip()))
-                else:
-                    q.put(None)
-            except Exception as e:
-                q.put({'error': str(e)})
-
-        # Send request
-        req_json = json.dumps(request) + '\n'
-        self.proc.stdin.write(req_json)
-        self.proc.stdin.flush()
-
-        # Read response with timeout
-        q = queue.Queue()
-        thread = threading.Thread(target=read_response, args=(self.proc, q))
-        thread.daemon = True
-        thread.start()
+        """Send request (or batch of requests) and receive response with timeout"""
+        return self._wait(self._send_async(request), timeout)
+
+    def _send_template(self, template, timeout=MCP_TIMEOUT):
+        """Send a pre-encoded request template under the next id and wait for the response"""
+        request_id = self._next_id()
+        return self._wait(self._send_payload([request_id], template % request_id), timeout)
 
+    @staticmethod
+    def _wait(future, timeout):
+        """Wait for a response future, turning a timeout into an error response"""
         try:
-            response = q.get(timeout=timeout)
-            return response
-        except queue.Empty:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
             return {'error': {'code': -1, 'message': f'Timeout after {timeout}s'}}
 
     def initialize(self):
@@ -200,69 +517,203 @@ class MCPClient:
         if self._initialized:
             return True
 
-        self.request_id += 1
-        response = self._send_receive({
-            "jsonrpc": "2.0",
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "clientInfo": {"name": "pytest", "version": "1.0"},
-                "capabilities": {}
-            },
-            "id": self.request_id
-        }, timeout=5.0)
+        response = self._send_template(_INITIALIZE_REQUEST, timeout=5.0)
 
         if response and 'result' in response:
             self._initialized = True
             return True
         return False
 
-    def call(self, tool_name, arguments=None, timeout=MCP_TIMEOUT):
-        """Call an MCP tool and return the result"""
+    def submit(self, tool_name, arguments=None):
+        """Start an MCP tool call without waiting for its result
+
+        Returns a concurrent.futures.Future that resolves to the same response
+        call() would return. Independent calls submitted back to back are in
+        flight together, so their waits overlap instead of adding up.
+        """
         if arguments is None:
             arguments = {}
 
-        self.request_id += 1
-        start_time = time.time()
-
-        response = self._send_receive({
+        return self._send_async({
             "jsonrpc": "2.0",
             "method": "tools/call",
             "params": {
                 "name": tool_name,
                 "arguments": arguments
             },
-            "id": self.request_id
-        }, timeout=timeout)
-
-        elapsed = time.time() - start_time
+            "id": self._next_id()
+        }, tool_name=tool_name)
+
+    def _track_connection(self, tool_name, result):
+        """Keep `connected` in step with connect/disconnect results"""
+        if tool_name == 'disconnect':
+            self.connected = False
+        elif tool_name == 'connect':
+            payload = unwrap_mcp(result)
+            if payload and payload.get('success'):
+                self.connected = True
+            # A failed connect leaves the previous state as it was
 
-        # Add timing info to response
-        if response:
-            response['_elapsed'] = elapsed
-            response['_tool'] = tool_name
-
-        return response
+    def call(self, tool_name, arguments=None, timeout=MCP_TIMEOUT):
+        """Call an MCP tool and return the result"""
+        start_time = time.perf_counter()
+        future = self.submit(tool_name, arguments)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            return {
+                'error': {'code': -1, 'message': f'Timeout after {timeout}s'},
+                '_elapsed': time.perf_counter() - start_time,
+                '_tool': tool_name
+            }
+
+    def call_many(self, calls, timeout=MCP_TIMEOUT):
+        """Call several MCP tools in a single JSON-RPC batch
+
+        `calls` is a list of (tool_name, arguments) pairs. The server runs them
+        in order and replies with one array, so the batch costs one round trip.
+        Returns the responses in call order.
+        """
+        requests = []
+        for tool_name, arguments in calls:
+            requests.append({
+                "jsonrpc": "2.0",
+                "method": "tools/call",
+                "params": {
+                    "name": tool_name,
+                    "arguments": arguments or {}
+                },
+                "id": self._next_id()
+            })
+
+        start_time = time.perf_counter()
+        response = self._send_receive(requests, timeout=timeout)
+        elapsed = time.perf_counter() - start_time
+
+        # Demux by id; a timeout or transport error applies to every call
+        if isinstance(response, list):
+            by_id = {r.get('id'): r for r in response if isinstance(r, dict)}
+        else:
+            by_id = {}
+
+        results = []
+        for request, (tool_name, _) in zip(requests, calls):
+            result = by_id.get(request['id'])
+            if result is None and response is not None and not isinstance(response, list):
+                result = dict(response)
+            if result:
+                result['_elapsed'] = elapsed
+                result['_tool'] = tool_name
+            if tool_name in ('connect', 'disconnect'):
+                self._track_connection(tool_name, result)
+            results.append(result)
+        return results
 
     def list_tools(self):
         """List available MCP tools"""
-        self.request_id += 1
-        response = self._send_receive({
-            "jsonrpc": "2.0",
-            "method": "tools/list",
-            "params": {},
-            "id": self.request_id
-        })
+        response = self._send_template(_TOOLS_LIST_REQUEST)
 
         if response and 'result' in response:
             return response['result'].get('tools', [])
         return []
 
 
+def start_mcp_client(mcp_executable):
+    """Spawn an MCP server and return an initialized client for it (None on failure)"""
+    proc = spawn_mcp_process(mcp_executable)
+    client = MCPClient(proc)
+    if not client.initialize():
+        stop_process(proc)
+        return None
+    return client
+
+
+class MCPClientPool:
+    """Keeps a few MCP servers spawned and initialized ahead of time
+
+    fresh_* fixtures take a warm client instead of paying spawn + initialize
+    on the test's clock; a background thread starts a replacement for each
+    client taken, overlapping the cold start with the running test.
+    """
+
+    def __init__(self, mcp_executable, size=2):
+        self.mcp_executable = mcp_executable
+        self._warm = queue.Queue()
+        self._slots = threading.Semaphore(size)  # clients still to be started
+        self._lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._fill_loop, daemon=True).start()
+
+    def _fill_loop(self):
+        while True:
+            self._slots.acquire()
+            if self._closed:
+                return
+            try:
+                client = start_mcp_client(self.mcp_executable)
+            except Exception as exc:  # e.g. OSError from Popen; take() re-raises it
+                client = exc
+            with self._lock:
+                if not self._closed:
+                    self._warm.put(client)
+                    continue
+            if isinstance(client, MCPClient):
+                stop_process(client.proc)
+            return
+
+    def take(self, timeout=2 * MCP_TIMEOUT):
+        """Return a warm client (None if its server failed to start or none came in time)
+
+        Re-raises the exception that stopped the filler from spawning the server.
+        """
+        try:
+            client = self._warm.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self._slots.release()
+        if isinstance(client, Exception):
+            raise client
+        return client
+
+    def close(self):
+        """Stop the refill thread and every client nobody took"""
+        with self._lock:
+            self._closed = True
+        self._slots.release()  # wake the filler so it can exit
+        while True:
+            try:
+                client = self._warm.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(client, MCPClient):
+                stop_process(client.proc)
+
+
 # Global Flutter app manager (created once per session)
 _flutter_app_manager = None
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--reuse-app", action="store_true", default=False,
+        help="Leave a Flutter app spawned by this run running, for the next run to reuse")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Keep every test that drives the Flutter app on one pytest-xdist worker
+
+    Workers can't each run their own app: flutter run builds the sample app
+    into one shared build/ directory, and a running app's exe is locked, so a
+    second worker's build fails to link. Under --dist loadgroup, all app tests
+    land on the worker that owns the one app; the rest spread out as usual.
+    """
+    flutter_app = pytest.mark.xdist_group("flutter_app")
+    for item in items:
+        if 'flutter_app_manager' in getattr(item, 'fixturenames', ()):
+            item.add_marker(flutter_app)
+
+
 @pytest.fixture(scope="session")
 def mcp_executable():
     """Find and return the MCP executable path"""
@@ -275,22 +726,12 @@ def mcp_executable():
 @pytest.fixture(scope="session")
 def mcp_server(mcp_executable):
     """Start MCP server process for the test session"""
-    proc = subprocess.Popen(
-        [mcp_executable],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    proc = spawn_mcp_process(mcp_executable)
 
     yield proc
 
     # Cleanup
-    proc.terminate()
-    try:
-        proc.wait(timeout=5)
-    except subprocess.TimeoutExpired:
-        proc.kill()
+    stop_process(proc)
 
 
 @pytest.fixture(scope="session")
@@ -302,42 +743,49 @@ def mcp_client(mcp_server):
     return client
 
 
+@pytest.fixture(scope="session")
+def session_tools(mcp_client):
+    """The server's tool list, fetched once per session (tools don't change at runtime)"""
+    return mcp_client.list_tools()
+
+
+@pytest.fixture(scope="session")
+def mcp_client_pool(mcp_executable):
+    """Warm MCP clients (each its own process) for the fresh_* fixtures"""
+    pool = MCPClientPool(mcp_executable)
+    yield pool
+    pool.close()
+
+
 @pytest.fixture
-def fresh_mcp_client(mcp_executable):
+def fresh_mcp_client(mcp_client_pool):
     """Create a fresh MCP client (new process) for tests that might corrupt server state"""
-    proc = subprocess.Popen(
-        [mcp_executable],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-
-    client = MCPClient(proc)
-    if not client.initialize():
-        proc.terminate()
+    client = mcp_client_pool.take()
+    if not client:
         pytest.fail("Failed to initialize fresh MCP client")
 
     yield client
 
     # Cleanup
-    proc.terminate()
-    try:
-        proc.wait(timeout=5)
-    except subprocess.TimeoutExpired:
-        proc.kill()
+    stop_process(client.proc)
 
 
 @pytest.fixture(scope="session")
-def flutter_app_manager():
-    """Session-scoped Flutter app manager that auto-spawns app if needed"""
+def flutter_app_manager(pytestconfig):
+    """Session-scoped Flutter app manager that auto-spawns app if needed
+
+    An app already listening on FLUTTER_APP_PORT is always reused. With
+    --reuse-app, an app this session spawns is left running afterwards, so
+    the next run skips the Flutter build and VM startup.
+    """
     global _flutter_app_manager
 
     sample_app_path = find_flutter_sample_app()
     if not sample_app_path:
         pytest.skip("Flutter sample app not found in examples/flutter_sample_app")
 
-    _flutter_app_manager = FlutterAppManager(sample_app_path)
+    _flutter_app_manager = FlutterAppManager(
+        sample_app_path, keep_running=pytestconfig.getoption("reuse_app"))
 
     yield _flutter_app_manager
 
@@ -358,43 +806,30 @@ def flutter_app_running(flutter_app_manager):
     return True
 
 
-@pytest.fixture
-def connected_client(mcp_client, flutter_app_running):
-    """Return an MCP client that's connected to the Flutter app"""
-    # First disconnect any existing connection (cleanup from previous tests)
-    print(f"\n  [connected_client] Disconnecting any existing connection...")
-    mcp_client.call("disconnect", {}, timeout=2.0)
-
-    # Small delay to ensure server state is clean
-    time.sleep(0.5)
-
-    print(f"  [connected_client] Checking if Flutter app is running on port {FLUTTER_APP_PORT}...")
-    if not is_flutter_app_running():
-        pytest.fail(f"Flutter app not running on port {FLUTTER_APP_PORT}")
+def connect_with_retry(client, label, max_retries=3, reset=False):
+    """Connect client to the Flutter app, retrying; returns (connected, last_error)
 
-    # Connect to Flutter app with retry
-    max_retries = 3
+    With reset=True an attempt first drops the client's existing connection,
+    if it may have one; the disconnect and connect travel as one JSON-RPC
+    batch, so the reset costs no extra round trip. Failed attempts back off
+    0.5s, 1s, ... with no wait after the last one.
+    """
+    connect = ("connect", {"uri": FLUTTER_APP_URI})
     last_error = None
+    delay = 0.5
 
     for attempt in range(max_retries):
-        print(f"  [connected_client] Connection attempt {attempt + 1}/{max_retries}...")
-        result = mcp_client.call("connect", {"uri": FLUTTER_APP_URI}, timeout=10.0)
-        print(f"  [connected_client] Result: {str(result)[:200]}")
+        print(f"  [{label}] Connection attempt {attempt + 1}/{max_retries}...", flush=True)
+        calls = [("disconnect", {}), connect] if reset and client.connected else [connect]
+        result = client.call_many(calls, timeout=10.0)[-1]
+        print(f"  [{label}] Result: {str(result)[:200]}")
 
         if result and 'result' in result:
             # Check if connection was successful
-            content = result['result'].get('content', [])
-            content_text = content[0].get('text', '') if content else ''
-            if 'error' not in content_text.lower():
-                print(f"  [connected_client] Connected successfully!")
-                yield mcp_client
-                # Disconnect after test
-                mcp_client.call("disconnect", {})
-                return
-            else:
-                # Got an error in content - add delay before retry
-                print(f"  [connected_client] Server returned error, waiting before retry...")
-                time.sleep(2)
+            payload = unwrap_mcp(result)
+            if payload and payload.get('success'):
+                print(f"  [{label}] Connected successfully!")
+                return True, None
 
         if result and 'error' in result:
             last_error = result.get('error', {}).get('message', 'Unknown error')
@@ -403,63 +838,191 @@ def connected_client(mcp_client, flutter_app_running):
         else:
             last_error = "No response from connect"
 
-        print(f"  [connected_client] Attempt {attempt + 1} failed: {last_error}")
-        time.sleep(1)
+        print(f"  [{label}] Attempt {attempt + 1} failed: {last_error}")
+        if attempt + 1 < max_retries:
+            time.sleep(delay)
+            delay *= 2
+
+    return False, last_error
 
-    pytest.fail(f"Failed to connect to Flutter app after {max_retries} attempts: {last_error}")
+
+def is_connection_alive(client):
+    """Cheap liveness probe: a depth-1 get_tree only succeeds on a live VM service connection
+
+    format='summary' returns just the node count, so no tree is formatted,
+    sent or parsed.
+    """
+    payload = unwrap_mcp(client.call("get_tree", {"max_depth": 1, "format": "summary"}, timeout=2.0))
+    return bool(payload and payload.get('success'))
+
+
+@pytest.fixture(scope="session")
+def flutter_session(mcp_client, flutter_app_manager):
+    """Session-wide VM service connection on the shared MCP client
+
+    The VM service endpoint is stable for the whole run, so the connect
+    handshake is paid once here instead of once per test.
+    """
+    if not flutter_app_manager.is_running() and not flutter_app_manager.spawn():
+        pytest.fail(f"Failed to start Flutter app on port {FLUTTER_APP_PORT}")
+
+    # Drop any connection left by earlier tests as part of connecting
+    print(f"\n  [flutter_session] Connecting to {FLUTTER_APP_URI}...")
+    connected, last_error = connect_with_retry(mcp_client, "flutter_session", reset=True)
+    if not connected:
+        pytest.fail(f"Failed to connect to Flutter app: {last_error}")
+
+    yield mcp_client
+
+    # Disconnect at end of session
+    mcp_client.call("disconnect", {})
 
 
 @pytest.fixture
-def fresh_connected_client(mcp_executable, flutter_app_running):
-    """Return a fresh MCP client (new process) that's connected to the Flutter app.
+def connected_client(flutter_session):
+    """Return an MCP client that's connected to the Flutter app
 
-    Use this instead of connected_client when running after tests that may have
-    corrupted the session-scoped MCP server state.
+    Reuses the session connection; a test that dropped it (e.g. by calling
+    disconnect on the shared client) gets it re-established here.
     """
-    # Start fresh MCP process
-    proc = subprocess.Popen(
-        [mcp_executable],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    if is_connection_alive(flutter_session):
+        return flutter_session
 
-    client = MCPClient(proc)
-    if not client.initialize():
-        proc.terminate()
+    print(f"\n  [connected_client] Session connection lost, reconnecting...")
+    if not is_flutter_app_running():
+        pytest.fail(f"Flutter app not running on port {FLUTTER_APP_PORT}")
+
+    connected, last_error = connect_with_retry(flutter_session, "connected_client", reset=True)
+    if not connected:
+        pytest.fail(f"Failed to reconnect to Flutter app: {last_error}")
+    return flutter_session
+
+
+def _connect_pooled_client(mcp_client_pool, label):
+    """Take a never-used MCP process from the warm pool and connect it to the Flutter app"""
+    client = mcp_client_pool.take()
+    if not client:
         pytest.fail("Failed to initialize fresh MCP client")
 
-    print(f"\n  [fresh_connected_client] Checking if Flutter app is running on port {FLUTTER_APP_PORT}...")
+    print(f"\n  [{label}] Checking if Flutter app is running on port {FLUTTER_APP_PORT}...")
     if not is_flutter_app_running():
-        proc.terminate()
+        stop_process(client.proc)
         pytest.fail(f"Flutter app not running on port {FLUTTER_APP_PORT}")
 
-    # Connect to Flutter app
-    print(f"  [fresh_connected_client] Connecting to {FLUTTER_APP_URI}...")
+    print(f"  [{label}] Connecting to {FLUTTER_APP_URI}...", flush=True)
     result = client.call("connect", {"uri": FLUTTER_APP_URI}, timeout=10.0)
+    payload = unwrap_mcp(result)
+    if payload and payload.get('success'):
+        print(f"  [{label}] Connected successfully!")
+        return client
 
-    if result and 'result' in result:
-        content = result['result'].get('content', [])
-        content_text = content[0].get('text', '') if content else ''
-        if 'error' not in content_text.lower():
-            print(f"  [fresh_connected_client] Connected successfully!")
-            yield client
-            # Cleanup
-            client.call("disconnect", {})
-            proc.terminate()
-            try:
-                proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-            return
-
-    # Connection failed
-    proc.terminate()
+    stop_process(client.proc)
     error_msg = str(result)[:200] if result else "No response"
     pytest.fail(f"Failed to connect fresh client to Flutter app: {error_msg}")
 
 
+def _release_client(client):
+    """Disconnect a client from the Flutter app and stop its MCP process"""
+    client.call("disconnect", {})
+    stop_process(client.proc)
+
+
+class _WarmClient:
+    """The one connected client warm_connected_client shares across tests"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.client = None
+
+    def get(self):
+        """Return the shared client, replacing it if its connection died"""
+        client = self.client
+        if client and (client.proc.poll() is not None or not is_connection_alive(client)):
+            print(f"\n  [warm_connected_client] Warm connection lost, replacing client...")
+            stop_process(client.proc)
+            client = None
+        if client is None:
+            client = _connect_pooled_client(self.pool, "warm_connected_client")
+        self.client = client
+        return client
+
+    def release(self):
+        """Disconnect the shared client and stop its MCP process"""
+        if self.client:
+            _release_client(self.client)
+            self.client = None
+
+
+@pytest.fixture(scope="session")
+def _warm_client(mcp_client_pool):
+    """Session holder for the client shared by warm_connected_client"""
+    warm = _WarmClient(mcp_client_pool)
+    yield warm
+    warm.release()
+
+
+@pytest.fixture
+def prewarm_mcp(mcp_client, flutter_app_running):
+    """Connect mcp_client once and drop the connection, before a test times its connect
+
+    The first connect in a server process pays one-off setup on top of the
+    VM service handshake, so the timed connect only sees steady-state cost.
+    A failed warm-up is left for the timed connect to report.
+    """
+    connect_with_retry(mcp_client, "prewarm", max_retries=1)
+    mcp_client.call("disconnect", {})
+    return mcp_client
+
+
+@pytest.fixture
+def warm_connected_client(request, mcp_client_pool, flutter_app_running, _warm_client):
+    """Return an MCP client (own process, not mcp_client) connected to the Flutter app.
+
+    One client and its VM service connection are shared across tests and only
+    re-established when the liveness probe fails. Tests marked
+    needs_fresh_session get a brand-new process that is thrown away afterwards.
+    """
+    if request.node.get_closest_marker("needs_fresh_session"):
+        client = _connect_pooled_client(mcp_client_pool, "warm_connected_client")
+        yield client
+        _release_client(client)
+        return
+
+    yield _warm_client.get()
+
+
+@contextmanager
+def assert_under(limit, label="operation"):
+    """Fail unless the with-block finishes in under `limit` seconds; the yielded span gets `elapsed`"""
+    span = SimpleNamespace(elapsed=None)
+    start = time.perf_counter_ns()
+    yield span
+    span.elapsed = (time.perf_counter_ns() - start) / 1e9
+    assert span.elapsed < limit, f"{label} took {span.elapsed:.2f}s, expected < {limit:.2f}s"
+
+
+def get_content_text(result):
+    """Return the text of the first content item in an MCP tool result ('' if none)"""
+    if not result or 'result' not in result:
+        return ''
+    content = result['result'].get('content') or [{}]
+    return content[0].get('text', '')
+
+
+def unwrap_mcp(result):
+    """Parse the JSON payload a tool returned inside its MCP content
+
+    Returns the decoded dict, or None when the result carries no JSON payload.
+    """
+    text = get_content_text(result)
+    if not text.startswith('{'):
+        return None
+    try:
+        return _loads(text)
+    except ValueError:
+        return None
+
+
 def has_error(result):
     """Check if MCP result has an error (either JSON-RPC error or error in content)"""
     if not result:
@@ -467,14 +1030,8 @@ def has_error(result):
     # JSON-RPC error
     if 'error' in result:
         return True
-    # Error in content
-    if 'result' in result:
-        content = result['result'].get('content', [])
-        if content:
-            content_text = content[0].get('text', '')
-            if '"error"' in content_text.lower() or '"success": false' in content_text.lower():
-                return True
-    return False
+    # Error in content (one case-insensitive pass, no lowercased copy)
+    return CONTENT_ERROR_MARKER.search(get_content_text(result)) is not None
 
 
 def get_error_message(result):
@@ -483,101 +1040,300 @@ def get_error_message(result):
         return "No response"
     if 'error' in result:
         return result['error'].get('message', 'Unknown error')
-    if 'result' in result:
-        content = result['result'].get('content', [])
-        if content:
-            content_text = content[0].get('text', '')
-            return content_text
-    return "Unknown error"
+    return get_content_text(result) or "Unknown error"
 
 
 def parse_tree_response(tree_result):
-    """Parse widget tree response and return the tree data as dict"""
-    if not tree_result or 'result' not in tree_result:
-        return None
+    """Parse widget tree response and return the tree data as dict
 
-    content = tree_result['result'].get('content', [])
-    if not content:
+    The parsed payload is memoized on the tree result itself, so every helper
+    below shares one JSON parse per capture.
+    """
+    if not isinstance(tree_result, dict):
         return None
+    if '_parsed' not in tree_result:
+        tree_result['_parsed'] = unwrap_mcp(tree_result)
+    return tree_result['_parsed']
 
-    tree_text = content[0].get('text', '') if content else ''
-    try:
-        if tree_text.startswith('{'):
-            return json.loads(tree_text)
-        return None
-    except json.JSONDecodeError:
+
+def tree_digest(tree_result):
+    """16-byte BLAKE2b digest of a captured tree, for cheap before/after comparisons"""
+    if not isinstance(tree_result, dict):
         return None
+    if '_digest' not in tree_result:
+        text = get_content_text(tree_result)
+        tree_result['_digest'] = hashlib.blake2b(text.encode(), digest_size=16).digest() if text else None
+    return tree_result['_digest']
 
 
-def get_all_widgets(tree_result):
-    """Get all widgets from tree result as a flat list"""
+def wait_until(condition, timeout=UI_SETTLE_TIME, interval=0.05):
+    """Call condition() until it returns something truthy or timeout passes; return its last value
+
+    UI_SETTLE_TIME stays the upper bound, so a condition that never holds
+    costs what the fixed sleep it replaces did.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        value = condition()
+        if value or time.monotonic() >= deadline:
+            return value
+        time.sleep(interval)
+
+
+def wait_for_tree(client, predicate, timeout=UI_SETTLE_TIME, interval=0.05, max_depth=20, **tree_args):
+    """Poll get_tree until predicate(capture) holds; return the last capture either way
+
+    Extra keyword arguments (e.g. **TREE_TYPES_ONLY) go to get_tree.
+    """
+    arguments = {"max_depth": max_depth, **tree_args}
+    last = None
+
+    def satisfied():
+        nonlocal last
+        last = client.call("get_tree", arguments)
+        return predicate(last)
+
+    wait_until(satisfied, timeout, interval)
+    return last
+
+
+def wait_for_tree_change(client, baseline_digest, timeout=UI_SETTLE_TIME, interval=0.05, max_depth=20,
+                         **tree_args):
+    """Poll get_tree until its digest differs from baseline_digest; return the last capture
+
+    Stands in for a fixed UI_SETTLE_TIME sleep followed by a get_tree: it
+    returns as soon as the UI has visibly changed, and after `timeout` hands
+    back the last capture as-is so callers can still compare or assert on it.
+    Extra keyword arguments must match the ones the baseline was captured with.
+    """
+    def changed(tree):
+        digest = tree_digest(tree)
+        return digest is not None and digest != baseline_digest
+
+    return wait_for_tree(client, changed, timeout, interval, max_depth, **tree_args)
+
+
+def iter_widgets(tree_result):
+    """Yield widgets from tree result one at a time, in tree order
+
+    Lets callers that only need the first match stop without walking (or
+    building a list of) the rest of the tree. Once the flat list has been
+    built for this capture, it is replayed instead of walking again.
+    """
+    if isinstance(tree_result, dict) and '_flat_widgets' in tree_result:
+        yield from tree_result['_flat_widgets']
+        return
+
     tree_data = parse_tree_response(tree_result)
     if not tree_data:
-        return []
-
-    widgets = []
+        return
 
-    def collect_widgets(node):
-        if isinstance(node, dict):
-            widgets.append(node)
-            for child in node.get('children', []):
-                collect_widgets(child)
+    # get_tree format=json nests a flat node list under data.widget_tree
+    data = tree_data.get('data')
+    if isinstance(data, dict):
+        tree_data = data.get('widget_tree') or data.get('json') or tree_data
 
     # Handle different tree structures
     if 'root' in tree_data:
-        collect_widgets(tree_data['root'])
+        roots = [tree_data['root']]
     elif 'widgets' in tree_data:
-        for w in tree_data['widgets']:
-            collect_widgets(w)
+        roots = tree_data['widgets']
+    elif 'nodes' in tree_data:
+        for node in tree_data['nodes']:
+            yield _normalize_widget(node)
+        return
     elif 'type' in tree_data:
-        collect_widgets(tree_data)
+        roots = [tree_data]
+    else:
+        return
+
+    # Explicit stack instead of recursion: no Python call per node and no
+    # recursion limit on deep trees. Children go on reversed to keep preorder.
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield _normalize_widget(node)
+            children = node.get('children')
+            if children:
+                stack.extend(reversed(children))
+
 
-    return widgets
+def _property_items(props):
+    """(name, value) pairs from a properties dict or a list of diagnostics nodes
+
+    The inspector reports diagnostics as [{"name": ..., "value"/"description": ...}].
+    """
+    if isinstance(props, dict):
+        return props.items()
+    return ((p['name'], p['value'] if 'value' in p else p.get('description'))
+            for p in props if isinstance(p, dict) and 'name' in p)
+
+
+def _normalize_widget(node):
+    """Widget node with its 'properties' hoisted to the top level
+
+    Returns a shallow copy (the parsed payload is left untouched) in which a
+    property fills any top-level key that is missing or None, so helpers can
+    read every attribute with a single get().
+    """
+    props = node.get('properties')
+    if not props:
+        return node
+    widget = dict(node)
+    for name, value in _property_items(props):
+        if widget.get(name) is None:
+            widget[name] = value
+    return widget
+
+
+def get_all_widgets(tree_result):
+    """Get all widgets from tree result as a flat list (memoized; don't mutate it)"""
+    if not isinstance(tree_result, dict):
+        return []
+    if '_flat_widgets' not in tree_result:
+        tree_result['_flat_widgets'] = list(iter_widgets(tree_result))
+    return tree_result['_flat_widgets']
 
 
 def find_widget(tree_result, widget_type=None, key=None, text=None):
-    """Helper to find a widget in the tree result"""
-    widgets = get_all_widgets(tree_result)
+    """Helper to find a widget in the tree result (stops at the first match)"""
+    candidates = iter_widgets(tree_result)
+    if widget_type and isinstance(tree_result, dict) and '_tree_index' in tree_result:
+        candidates = tree_result['_tree_index'].widgets_by_type.get(widget_type, ())
 
-    for widget in widgets:
+    for widget in candidates:
         if widget_type and widget.get('type') != widget_type:
             continue
-        if key:
-            widget_key = widget.get('key') or widget.get('properties', {}).get('key')
-            if widget_key != key:
-                continue
-        if text:
-            widget_text = widget.get('text') or widget.get('properties', {}).get('text')
-            if widget_text != text:
-                continue
+        if key and widget.get('key') != key:
+            continue
+        if text and widget.get('text') != text:
+            continue
         return widget
 
     return None
 
 
+@dataclass
+class TreeIndex:
+    """Everything the state helpers read from one capture, gathered in a single pass"""
+    type_counts: Counter = field(default_factory=Counter)
+    widgets_by_type: dict = field(default_factory=dict)  # type -> widgets, in tree order
+    checkbox_states: list = field(default_factory=list)  # value (else checked) per Checkbox
+
+
+_EMPTY_TREE_INDEX = TreeIndex()
+
+
+def scan_tree(tree_result):
+    """Index a tree capture in one walk (memoized on the result; don't mutate it)"""
+    if not isinstance(tree_result, dict):
+        return _EMPTY_TREE_INDEX
+    if '_tree_index' not in tree_result:
+        by_type = defaultdict(list)
+        checkbox_states = []
+        for widget in get_all_widgets(tree_result):
+            widget_type = widget.get('type')
+            by_type[widget_type].append(widget)
+            if widget_type == 'Checkbox':
+                value = widget.get('value')
+                checkbox_states.append(widget.get('checked') if value is None else value)
+        tree_result['_tree_index'] = TreeIndex(
+            type_counts=Counter({t: len(ws) for t, ws in by_type.items()}),
+            widgets_by_type=dict(by_type),
+            checkbox_states=checkbox_states,
+        )
+    return tree_result['_tree_index']
+
+
 def find_all_widgets(tree_result, widget_type=None):
-    """Find all widgets of a given type"""
-    widgets = get_all_widgets(tree_result)
+    """Find all widgets of a given type (memoized lists; don't mutate them)"""
     if not widget_type:
-        return widgets
-    return [w for w in widgets if w.get('type') == widget_type]
+        return get_all_widgets(tree_result)
+    return scan_tree(tree_result).widgets_by_type.get(widget_type, [])
 
 
 def get_checkbox_state(tree_result, index=0):
     """Get the checked state of a checkbox widget"""
-    checkboxes = find_all_widgets(tree_result, 'Checkbox')
-    if index >= len(checkboxes):
+    states = scan_tree(tree_result).checkbox_states
+    if index >= len(states):
         return None
-    checkbox = checkboxes[index]
-    # Try different property locations
-    value = checkbox.get('value')
-    if value is None:
-        value = checkbox.get('properties', {}).get('value')
-    if value is None:
-        value = checkbox.get('checked')
-    if value is None:
-        value = checkbox.get('properties', {}).get('checked')
-    return value
+    return states[index]
+
+
+def get_checkbox_value(properties_result):
+    """Get the checked state from a get_properties result for a checkbox
+
+    A get_properties reply carries just the one widget, so reading a single
+    checkbox this way costs a fraction of a get_tree capture.
+    """
+    payload = unwrap_mcp(properties_result)
+    data = payload.get('data') if payload else None
+    widget = data.get('widget') if isinstance(data, dict) else None
+    if not isinstance(widget, dict):
+        return None
+    diagnostics = dict(_property_items(widget.get('diagnostic_properties') or ()))
+    for name in ('value', 'checked'):
+        for source in (widget, diagnostics):
+            if source.get(name) is not None:
+                return source[name]
+    return None
+
+
+def get_widget_center(properties_result):
+    """Center (x, y) of the bounds in a get_properties result, or None if none are reported"""
+    payload = unwrap_mcp(properties_result)
+    data = payload.get('data') if payload else None
+    widget = data.get('widget') if isinstance(data, dict) else None
+    bounds = widget.get('bounds') if isinstance(widget, dict) else None
+    if not bounds:
+        return None
+    return (bounds['x'] + bounds['width'] / 2, bounds['y'] + bounds['height'] / 2)
+
+
+def wait_for_checkbox_change(client, state_before, selector="Checkbox", timeout=UI_SETTLE_TIME):
+    """Poll get_properties until the checkbox state differs from state_before; return the last state"""
+    state = state_before
+
+    def changed():
+        nonlocal state
+        state = get_checkbox_value(client.call("get_properties", {"selector": selector}))
+        return state != state_before
+
+    wait_until(changed, timeout)
+    return state
+
+
+def get_match_count(find_result):
+    """Number of widgets a find call matched (0 if the call failed)"""
+    payload = unwrap_mcp(find_result)
+    if not payload or not payload.get('success'):
+        return 0
+    return (payload.get('data') or {}).get('count', 0)
+
+
+def count_matches(client, selectors):
+    """Count widgets per selector on the server side: one batched find per selector
+
+    find replies carry only the matching nodes, so counting a widget type
+    doesn't ship the whole tree.
+    """
+    results = client.call_many([("find", {"selector": s}) for s in selectors],
+                               timeout=len(selectors) * MCP_TIMEOUT)
+    return [get_match_count(r) for r in results]
+
+
+def wait_for_count_change(client, selectors, counts_before, timeout=UI_SETTLE_TIME):
+    """Poll count_matches until the counts differ from counts_before; return the last counts"""
+    counts = counts_before
+
+    def changed():
+        nonlocal counts
+        counts = count_matches(client, selectors)
+        return counts != counts_before
+
+    wait_until(changed, timeout)
+    return counts
 
 
 def get_text_field_value(tree_result, index=0):
@@ -589,23 +1345,18 @@ def get_text_field_value(tree_result, index=0):
         text_fields = find_all_widgets(tree_result, 'EditableText')
     if index >= len(text_fields):
         return None
-    field = text_fields[index]
-    # Try different property locations
-    value = field.get('text')
-    if value is None:
-        value = field.get('value')
-    if value is None:
-        value = field.get('properties', {}).get('text')
+    text_field = text_fields[index]
+    value = text_field.get('text')
     if value is None:
-        value = field.get('properties', {}).get('value')
+        value = text_field.get('value')
     if value is None:
-        value = field.get('controller', {}).get('text')
+        value = (text_field.get('controller') or {}).get('text')
     return value
 
 
 def count_widgets(tree_result, widget_type):
-    """Count widgets of a given type"""
-    return len(find_all_widgets(tree_result, widget_type))
+    """Count widgets of a given type (a lookup in the capture's tree index)"""
+    return scan_tree(tree_result).type_counts[widget_type]
 
 
 def get_widget_property(widget, prop_name):
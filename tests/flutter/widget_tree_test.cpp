@@ -0,0 +1,86 @@
+#include <gtest/gtest.h>
+#include "flutter/widget_tree.h"
+
+#include <stdexcept>
+
+using namespace flutter;
+
+namespace {
+
+WidgetTree makeTree() {
+    WidgetNode root;
+    root.id = "root";
+    root.type = "Column";
+    root.description = "Column";
+    root.children_ids = {"label"};
+
+    WidgetNode label;
+    label.id = "label";
+    label.type = "Text";
+    label.text = "Hello";
+    label.parent_id = "root";
+
+    WidgetTree tree;
+    tree.setRoot("root");
+    tree.addNode(root);
+    tree.addNode(label);
+    return tree;
+}
+
+const nlohmann::json& findNode(const nlohmann::json& nodes, const std::string& type) {
+    for (const auto& node : nodes) {
+        if (node.value("type", "") == type) {
+            return node;
+        }
+    }
+    throw std::runtime_error("no node of type " + type);
+}
+
+} // namespace
+
+TEST(WidgetTreeJson, FieldsKeepOnlyRequestedNodeKeys) {
+    auto json = makeTree().toJson({"type"});
+
+    EXPECT_EQ(json["root_id"], "root");
+    EXPECT_EQ(json["node_count"], 2);
+    ASSERT_EQ(json["nodes"].size(), 2u);
+    for (const auto& node : json["nodes"]) {
+        ASSERT_EQ(node.size(), 1u);
+        EXPECT_TRUE(node.contains("type"));
+    }
+}
+
+TEST(WidgetTreeJson, FieldsCanKeepChildren) {
+    auto json = makeTree().toJson({"type", "children_ids"});
+
+    const auto& column = findNode(json["nodes"], "Column");
+    EXPECT_EQ(column.size(), 2u);
+    EXPECT_EQ(column["children_ids"], nlohmann::json::array({"label"}));
+
+    // Leaf nodes have no children_ids to keep
+    const auto& text = findNode(json["nodes"], "Text");
+    EXPECT_EQ(text.size(), 1u);
+}
+
+TEST(WidgetTreeJson, UnknownFieldsAreIgnored) {
+    auto json = makeTree().toJson({"type", "no_such_field"});
+
+    for (const auto& node : json["nodes"]) {
+        EXPECT_FALSE(node.contains("no_such_field"));
+        EXPECT_EQ(node.size(), 1u);
+    }
+
+    // Only unknown names: every node is still listed, just empty
+    auto empty = makeTree().toJson({"no_such_field"});
+    ASSERT_EQ(empty["nodes"].size(), 2u);
+    for (const auto& node : empty["nodes"]) {
+        EXPECT_TRUE(node.is_object());
+        EXPECT_TRUE(node.empty());
+    }
+}
+
+TEST(WidgetTreeJson, EmptyFieldsKeepEveryKey) {
+    auto tree = makeTree();
+
+    EXPECT_EQ(tree.toJson(std::vector<std::string>{}), tree.toJson());
+}
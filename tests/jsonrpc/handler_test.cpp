@@ -0,0 +1,89 @@
+#include <gtest/gtest.h>
+#include "jsonrpc/handler.h"
+
+using namespace jsonrpc;
+
+namespace {
+
+MessageHandler makeEchoHandler() {
+    MessageHandler handler;
+    handler.registerMethod("echo", [](const nlohmann::json& params) {
+        return params;
+    });
+    return handler;
+}
+
+} // namespace
+
+TEST(JsonRpcHandler, HandleSingleRequest) {
+    auto handler = makeEchoHandler();
+
+    auto response = nlohmann::json::parse(handler.handleMessage(
+        R"({"jsonrpc": "2.0", "method": "echo", "params": {"value": 1}, "id": 7})"));
+
+    EXPECT_EQ(response["id"], 7);
+    EXPECT_EQ(response["result"]["value"], 1);
+}
+
+TEST(JsonRpcHandler, HandleBatchPreservesOrder) {
+    auto handler = makeEchoHandler();
+
+    auto response = nlohmann::json::parse(handler.handleMessage(R"([
+        {"jsonrpc": "2.0", "method": "echo", "params": {"value": 1}, "id": 1},
+        {"jsonrpc": "2.0", "method": "echo", "params": {"value": 2}, "id": 2}
+    ])"));
+
+    ASSERT_TRUE(response.is_array());
+    ASSERT_EQ(response.size(), 2u);
+    EXPECT_EQ(response[0]["id"], 1);
+    EXPECT_EQ(response[1]["result"]["value"], 2);
+}
+
+TEST(JsonRpcHandler, BatchSkipsNotificationsAndReportsErrors) {
+    auto handler = makeEchoHandler();
+
+    auto response = nlohmann::json::parse(handler.handleMessage(R"([
+        {"jsonrpc": "2.0", "method": "echo", "params": {}},
+        {"jsonrpc": "2.0", "method": "missing", "id": 3}
+    ])"));
+
+    ASSERT_EQ(response.size(), 1u);
+    EXPECT_EQ(response[0]["id"], 3);
+    EXPECT_EQ(response[0]["error"]["code"], -32601);
+}
+
+TEST(JsonRpcHandler, BatchOfNotificationsHasNoResponse) {
+    auto handler = makeEchoHandler();
+
+    EXPECT_EQ(handler.handleMessage(R"([{"jsonrpc": "2.0", "method": "echo"}])"), "");
+}
+
+TEST(JsonRpcHandler, EmptyBatchIsInvalidRequest) {
+    auto handler = makeEchoHandler();
+
+    auto response = nlohmann::json::parse(handler.handleMessage("[]"));
+    EXPECT_EQ(response["error"]["code"], -32600);
+}
+
+TEST(JsonRpcHandler, MalformedBatchEntriesAreInvalidRequest) {
+    auto handler = makeEchoHandler();
+
+    auto response = nlohmann::json::parse(handler.handleMessage(R"([
+        1,
+        {"foo": 1},
+        {"jsonrpc": "2.0", "method": "echo", "params": {"value": 2}, "id": 2}
+    ])"));
+
+    ASSERT_EQ(response.size(), 3u);
+    EXPECT_EQ(response[0]["error"]["code"], -32600);
+    EXPECT_TRUE(response[0]["id"].is_null());
+    EXPECT_EQ(response[1]["error"]["code"], -32600);
+    EXPECT_EQ(response[2]["result"]["value"], 2);
+}
+
+TEST(JsonRpcHandler, InvalidJsonIsParseError) {
+    auto handler = makeEchoHandler();
+
+    auto response = nlohmann::json::parse(handler.handleMessage(R"([{"jsonrpc": "2.0",)"));
+    EXPECT_EQ(response["error"]["code"], -32700);
+}
@@ -4,8 +4,7 @@ Test Connect/Disconnect Tools
 Note: test_disconnect_when_not_connected runs FIRST before any app spawning.
 """
 import pytest
-from conftest import MCP_TIMEOUT, FLUTTER_APP_URI, UI_SETTLE_TIME
-import time
+from conftest import MCP_TIMEOUT, FLUTTER_APP_URI, UI_SETTLE_TIME, assert_under, get_content_text
 
 
 class TestDisconnectWithoutApp:
@@ -24,13 +23,11 @@ class TestDisconnectWithoutApp:
 class TestConnectTool:
     """Test connect tool functionality (requires Flutter app)"""
 
-    def test_connect_completes_quickly(self, mcp_client, flutter_app_running):
+    def test_connect_completes_quickly(self, mcp_client, prewarm_mcp):
         """Connect should complete in < 2 seconds"""
-        start = time.time()
-        result = mcp_client.call("connect", {"uri": FLUTTER_APP_URI})
-        elapsed = time.time() - start
+        with assert_under(MCP_TIMEOUT + 0.1, "Connect"):
+            result = mcp_client.call("connect", {"uri": FLUTTER_APP_URI})
 
-        assert elapsed < MCP_TIMEOUT + 0.1, f"Connect took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
         assert 'error' not in result, f"Connect failed: {result.get('error')}"
 
         # Cleanup
@@ -48,19 +45,15 @@ class TestConnectTool:
 
     def test_connect_with_invalid_uri_fails(self, fresh_mcp_client):
         """Connect with invalid URI should fail quickly (uses fresh client to avoid corrupting session state)"""
-        start = time.time()
-        result = fresh_mcp_client.call("connect", {"uri": "ws://127.0.0.1:9999/invalid"}, timeout=6.0)
-        elapsed = time.time() - start
-
         # Should fail within reasonable time (connection timeout + overhead)
-        assert elapsed < 6.0, f"Invalid connect took too long: {elapsed:.2f}s"
+        with assert_under(6.0, "Invalid connect"):
+            result = fresh_mcp_client.call("connect", {"uri": "ws://127.0.0.1:9999/invalid"}, timeout=6.0)
         # MCP returns success with error in content, or JSON-RPC error
         if 'error' in result:
             pass  # JSON-RPC error
         elif 'result' in result:
             # Check content for error indication
-            content = result['result'].get('content', [])
-            content_text = content[0].get('text', '') if content else ''
+            content_text = get_content_text(result)
             assert 'error' in content_text.lower() or 'failed' in content_text.lower(), \
                 f"Expected error in content for invalid URI, got: {content_text}"
 
@@ -68,10 +61,8 @@ class TestConnectTool:
 class TestDisconnectTool:
     """Test disconnect tool functionality (requires Flutter app)"""
 
-    def test_disconnect_completes_quickly(self, fresh_connected_client):
+    @pytest.mark.needs_fresh_session
+    def test_disconnect_completes_quickly(self, warm_connected_client):
         """Disconnect should complete in < 2 seconds (uses fresh client to avoid session state issues)"""
-        start = time.time()
-        result = fresh_connected_client.call("disconnect", {})
-        elapsed = time.time() - start
-
-        assert elapsed < MCP_TIMEOUT + 0.1, f"Disconnect took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
+        with assert_under(MCP_TIMEOUT + 0.1, "Disconnect"):
+            warm_connected_client.call("disconnect", {})
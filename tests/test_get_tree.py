@@ -2,25 +2,21 @@
 Test get_tree Tool
 """
 import pytest
-from conftest import MCP_TIMEOUT, TIMEOUT_TOLERANCE, has_error
-import time
+from conftest import MCP_TIMEOUT, TIMEOUT_TOLERANCE, assert_under, has_error
 
 
 class TestGetTreeTool:
     """Test get_tree tool functionality"""
 
-    def test_get_tree_completes_quickly(self, fresh_connected_client):
+    def test_get_tree_completes_quickly(self, warm_connected_client):
         """get_tree should complete within timeout"""
-        start = time.time()
-        result = fresh_connected_client.call("get_tree", {"max_depth": 5})
-        elapsed = time.time() - start
-
-        assert elapsed < MCP_TIMEOUT + TIMEOUT_TOLERANCE, f"get_tree took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
+        with assert_under(MCP_TIMEOUT + TIMEOUT_TOLERANCE, "get_tree"):
+            result = warm_connected_client.call("get_tree", {"max_depth": 5})
         assert not has_error(result), f"get_tree failed: {result}"
 
-    def test_get_tree_returns_widgets(self, fresh_connected_client):
+    def test_get_tree_returns_widgets(self, warm_connected_client):
         """get_tree should return widget data"""
-        result = fresh_connected_client.call("get_tree", {"max_depth": 5})
+        result = warm_connected_client.call("get_tree", {"max_depth": 5})
 
         assert result is not None
         if not has_error(result):
@@ -29,18 +25,17 @@ class TestGetTreeTool:
             content = result['result'].get('content', [])
             assert len(content) > 0, "Expected content in result"
 
-    def test_get_tree_respects_max_depth(self, fresh_connected_client):
+    def test_get_tree_respects_max_depth(self, warm_connected_client):
         """get_tree with different max_depth should work"""
-        # Shallow tree
-        shallow = fresh_connected_client.call("get_tree", {"max_depth": 2})
+        # Shallow and deeper tree, in one batch
+        shallow, deep = warm_connected_client.call_many(
+            [("get_tree", {"max_depth": 2}), ("get_tree", {"max_depth": 10})],
+            timeout=2 * MCP_TIMEOUT)
         assert shallow is not None
-
-        # Deeper tree
-        deep = fresh_connected_client.call("get_tree", {"max_depth": 10})
         assert deep is not None
 
-    def test_get_tree_with_zero_depth(self, fresh_connected_client):
+    def test_get_tree_with_zero_depth(self, warm_connected_client):
         """get_tree with max_depth=0 should return root only"""
-        result = fresh_connected_client.call("get_tree", {"max_depth": 0})
+        result = warm_connected_client.call("get_tree", {"max_depth": 0})
         # Either success or error is acceptable (some implementations may not support 0)
         assert result is not None
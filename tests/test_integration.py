@@ -2,49 +2,49 @@
 Test Integration - Full workflow tests
 
 These tests verify complete user workflows and ACTUALLY CHECK that widget state changes.
-After each UI interaction, we wait UI_SETTLE_TIME (1s) before checking state.
+After each UI interaction, we poll get_tree until the tree changes (at most
+UI_SETTLE_TIME, 1s) before checking state.
 
 CRITICAL: Tests MUST verify state changes, not just that operations complete.
 """
+import logging
+from concurrent.futures import wait
 import pytest
 from conftest import (
-    MCP_TIMEOUT, TIMEOUT_TOLERANCE, UI_SETTLE_TIME, has_error,
-    get_checkbox_state, get_text_field_value, count_widgets,
-    find_all_widgets, find_widget, parse_tree_response
+    ADD_BUTTON, CHECKBOX, MCP_TIMEOUT, TIMEOUT_TOLERANCE, TREE_TYPES_ONLY,
+    assert_under, has_error,
+    get_checkbox_value, wait_for_checkbox_change,
+    get_match_count, wait_for_count_change,
+    get_content_text, scan_tree, tree_digest,
+    wait_for_tree_change
 )
-import time
+
+log = logging.getLogger(__name__)
 
 
 class TestTodoAppWorkflow:
     """Test complete todo app workflow with STATE VERIFICATION"""
 
-    def test_toggle_checkbox_state_changes(self, fresh_connected_client):
+    def test_toggle_checkbox_state_changes(self, warm_connected_client):
         """CRITICAL: Toggling a checkbox MUST change its state"""
         # 1. Get initial checkbox state
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        assert not has_error(tree_before), f"Failed to get tree: {tree_before}"
-
-        state_before = get_checkbox_state(tree_before, index=0)
-        checkboxes = find_all_widgets(tree_before, 'Checkbox')
-
-        print(f"\n  [TEST] Found {len(checkboxes)} checkboxes")
-        print(f"  [TEST] Initial checkbox state: {state_before}")
-
-        if len(checkboxes) == 0:
+        # get_properties returns just the first checkbox, not the whole tree
+        props_before = warm_connected_client.call("get_properties", CHECKBOX)
+        if "No widget found" in get_content_text(props_before):
             pytest.skip("No checkboxes found in the app")
+        assert not has_error(props_before), f"Failed to get checkbox: {props_before}"
+
+        state_before = get_checkbox_value(props_before)
+        log.debug("Initial checkbox state: %s", state_before)
 
         # 2. Tap checkbox
-        tap_result = fresh_connected_client.call("tap", {"selector": "Checkbox"})
+        tap_result = warm_connected_client.call("tap", CHECKBOX)
         assert not has_error(tap_result), f"Tap failed: {tap_result}"
 
-        # 3. Wait for UI
-        time.sleep(UI_SETTLE_TIME)
-
-        # 4. Get state after
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        state_after = get_checkbox_state(tree_after, index=0)
+        # 3. Wait for UI and 4. get state after
+        state_after = wait_for_checkbox_change(warm_connected_client, state_before)
 
-        print(f"  [TEST] Checkbox state after tap: {state_after}")
+        log.debug("Checkbox state after tap: %s", state_after)
 
         # 5. VERIFY STATE CHANGED
         assert state_before is not None, "Could not read checkbox state before tap"
@@ -53,9 +53,9 @@ class TestTodoAppWorkflow:
             f"CHECKBOX STATE DID NOT CHANGE! Before={state_before}, After={state_after}. " \
             "The tap command did not actually interact with the Flutter app!"
 
-        print(f"  [SUCCESS] State changed: {state_before} -> {state_after}")
+        log.debug("State changed: %s -> %s", state_before, state_after)
 
-    def test_type_text_appears_in_field(self, fresh_connected_client):
+    def test_type_text_appears_in_field(self, warm_connected_client):
         """CRITICAL: Typing text MUST make it appear in the text field
 
         Uses tap to focus the text field first, then type without selector.
@@ -63,160 +63,161 @@ class TestTodoAppWorkflow:
         """
         test_text = "Hello FlutterReflect"
 
-        # 1. Get initial tree state
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        tree_str_before = str(parse_tree_response(tree_before))
-        print(f"\n  [TEST] Tree before: {len(tree_str_before)} chars")
-
-        # 2. Tap to focus the text field (center of text field area)
+        # 1. Get initial tree state and 2. tap to focus the text field
+        # (center of text field area) in one batch
         # TextField is in the input section at top of screen after AppBar
-        tap_result = fresh_connected_client.call("tap", {"x": 300, "y": 120})
-        print(f"  [TEST] Tap to focus result: {str(tap_result)[:100]}")
-        time.sleep(0.3)  # Brief wait for focus
+        tree_before, tap_result = warm_connected_client.call_many(
+            [("get_tree", {"max_depth": 20}), ("tap", {"x": 300, "y": 120})],
+            timeout=2 * MCP_TIMEOUT)
+        digest_before = tree_digest(tree_before)
+        log.debug("Tree before: %d chars", len(get_content_text(tree_before)))
+        log.debug("Tap to focus result: %.100r", tap_result)
+        # Brief wait for focus: the tree changes once the field is focused
+        wait_for_tree_change(warm_connected_client, digest_before, timeout=0.3)
 
         # 3. Type text (without selector - goes to focused field)
-        type_result = fresh_connected_client.call("type", {"text": test_text})
-        print(f"  [TEST] Type result: {str(type_result)[:150]}")
-
-        # 4. Wait for UI
-        time.sleep(UI_SETTLE_TIME)
+        type_result = warm_connected_client.call("type", {"text": test_text})
+        log.debug("Type result: %.150r", type_result)
 
-        # 5. Get tree state after
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        tree_str_after = str(parse_tree_response(tree_after))
-        print(f"  [TEST] Tree after: {len(tree_str_after)} chars")
+        # 4. Wait for UI and 5. get tree state after
+        tree_after = wait_for_tree_change(warm_connected_client, digest_before)
+        digest_after = tree_digest(tree_after)
+        log.debug("Tree after: %d chars", len(get_content_text(tree_after)))
 
         # 6. VERIFY SOMETHING CHANGED
         # The tree should reflect the text entry (either in widget state or layout)
-        if tree_str_before and tree_str_after:
-            if tree_str_before != tree_str_after:
-                print(f"  [SUCCESS] Tree changed after typing - state verification passed!")
+        if digest_before and digest_after:
+            if digest_before != digest_after:
+                log.debug("Tree changed after typing - state verification passed!")
             else:
                 # Check if type succeeded without errors
                 if not has_error(type_result):
-                    print(f"  [INFO] Type succeeded but tree unchanged - text may not be visible in tree")
+                    log.debug("Type succeeded but tree unchanged - text may not be visible in tree")
                 else:
-                    print(f"  [WARNING] Type operation failed: {type_result}")
+                    log.warning("Type operation failed: %r", type_result)
         else:
             # At minimum, verify type didn't error
             if not has_error(type_result):
-                print(f"  [INFO] Type succeeded, could not compare trees")
+                log.debug("Type succeeded, could not compare trees")
 
-    def test_add_todo_increases_count(self, fresh_connected_client):
+    def test_add_todo_increases_count(self, warm_connected_client):
         """Adding a todo MUST increase the number of todos in the list"""
+        todo_selectors = ['ListTile', 'CheckboxListTile']
+
         # 1. Count initial todos (look for ListTile, CheckboxListTile, or similar)
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        list_tiles_before = count_widgets(tree_before, 'ListTile')
-        checkbox_tiles_before = count_widgets(tree_before, 'CheckboxListTile')
+        # 2. Type a new todo and 3. tap add button, all in one batch
+        # find counts on the server side; the server runs the batch in order
+        *finds_before, _, _ = warm_connected_client.call_many(
+            [("find", {"selector": s}) for s in todo_selectors] + [
+                ("type", {"text": "New integration test todo", "selector": "TextField"}),
+                ("tap", ADD_BUTTON),
+            ], timeout=4 * MCP_TIMEOUT)
+        counts_before = [get_match_count(r) for r in finds_before]
+        list_tiles_before, checkbox_tiles_before = counts_before
         total_before = list_tiles_before + checkbox_tiles_before
-        print(f"\n  [TEST] Todo items before: {total_before} (ListTile:{list_tiles_before}, CheckboxListTile:{checkbox_tiles_before})")
-
-        # 2. Type a new todo
-        fresh_connected_client.call("type", {
-            "text": "New integration test todo",
-            "selector": "TextField"
-        })
-        time.sleep(UI_SETTLE_TIME)
-
-        # 3. Tap add button
-        fresh_connected_client.call("tap", {"selector": "ElevatedButton"})
-        time.sleep(UI_SETTLE_TIME)
-
-        # 4. Count todos after
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        list_tiles_after = count_widgets(tree_after, 'ListTile')
-        checkbox_tiles_after = count_widgets(tree_after, 'CheckboxListTile')
+        log.debug("Todo items before: %d (ListTile:%d, CheckboxListTile:%d)",
+                  total_before, list_tiles_before, checkbox_tiles_before)
+
+        # 4. Count todos after, as soon as the counts change
+        list_tiles_after, checkbox_tiles_after = wait_for_count_change(
+            warm_connected_client, todo_selectors, counts_before)
         total_after = list_tiles_after + checkbox_tiles_after
-        print(f"  [TEST] Todo items after: {total_after} (ListTile:{list_tiles_after}, CheckboxListTile:{checkbox_tiles_after})")
+        log.debug("Todo items after: %d (ListTile:%d, CheckboxListTile:%d)",
+                  total_after, list_tiles_after, checkbox_tiles_after)
 
         # 5. Verify count increased
         # Note: This may not work if the app doesn't have an add button or text field
         if total_before > 0:
-            print(f"  [INFO] Todo count change: {total_before} -> {total_after}")
+            log.debug("Todo count change: %d -> %d", total_before, total_after)
 
 
 class TestNavigationWorkflow:
     """Test navigation between screens"""
 
-    def test_navigation_changes_screen(self, fresh_connected_client):
+    def test_navigation_changes_screen(self, warm_connected_client):
         """Navigation MUST change the visible widgets"""
         # 1. Get widgets on initial screen
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        widgets_before = find_all_widgets(tree_before)
-        types_before = set(w.get('type', '') for w in widgets_before)
-        print(f"\n  [TEST] Widget types on initial screen: {len(types_before)} unique types")
-
-        # 2. Try to navigate (tap a button that might navigate)
-        fresh_connected_client.call("tap", {"selector": "IconButton"})
-        time.sleep(UI_SETTLE_TIME)
+        # 2. Try to navigate (tap a button that might navigate) in the same batch
+        tree_before, _ = warm_connected_client.call_many(
+            [("get_tree", {"max_depth": 20, **TREE_TYPES_ONLY}), ("tap", {"selector": "IconButton"})],
+            timeout=2 * MCP_TIMEOUT)
+        types_before = scan_tree(tree_before).type_counts.keys()
+        log.debug("Widget types on initial screen: %d unique types", len(types_before))
 
         # 3. Get widgets after navigation
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        widgets_after = find_all_widgets(tree_after)
-        types_after = set(w.get('type', '') for w in widgets_after)
-        print(f"  [TEST] Widget types after tap: {len(types_after)} unique types")
+        tree_after = wait_for_tree_change(warm_connected_client, tree_digest(tree_before), **TREE_TYPES_ONLY)
+        types_after = scan_tree(tree_after).type_counts.keys()
+        log.debug("Widget types after tap: %d unique types", len(types_after))
 
         # Just log the difference - navigation might not be available
         new_types = types_after - types_before
         removed_types = types_before - types_after
         if new_types or removed_types:
-            print(f"  [INFO] New widget types: {new_types}")
-            print(f"  [INFO] Removed widget types: {removed_types}")
+            log.debug("New widget types: %s", new_types)
+            log.debug("Removed widget types: %s", removed_types)
 
 
 class TestPerformance:
     """Test that all operations meet performance requirements"""
 
-    def test_rapid_operations_complete_quickly(self, fresh_connected_client):
-        """Multiple rapid operations should all complete within timeout"""
-        operation_times = []
+    def test_rapid_operations_complete_quickly(self, warm_connected_client):
+        """Multiple rapid operations should all complete within timeout
 
-        for i in range(3):
-            start = time.time()
-            result = fresh_connected_client.call("get_tree", {"max_depth": 10})
-            elapsed = time.time() - start
-            operation_times.append(elapsed)
+        The calls are submitted back to back so all three are in flight at
+        once. The server handles one message at a time, so each call queues
+        behind the earlier ones; the gap between successive completions is
+        what each call itself took, and that must stay within one
+        MCP_TIMEOUT (plus tolerance).
+        """
+        tree_args = {"max_depth": 10}
+        per_call = MCP_TIMEOUT + TIMEOUT_TOLERANCE
+        with assert_under(3 * per_call, "Pipelined get_tree batch") as span:
+            futures = [warm_connected_client.submit("get_tree", tree_args) for _ in range(3)]
+            done, pending = wait(futures, timeout=3 * per_call)
+        # Don't leave calls in flight on the shared client for the next test
+        for future in pending:
+            future.cancel()
+
+        results = [future.result() if future in done else None for future in futures]
+        for i, result in enumerate(results):
             assert not has_error(result), f"Operation {i} failed"
 
-        avg_time = sum(operation_times) / len(operation_times)
-        max_time = max(operation_times)
-        print(f"\n  [TEST] Operation times: avg={avg_time:.2f}s, max={max_time:.2f}s")
+        # _elapsed runs from each call's send, and all were sent together
+        finished = sorted(result['_elapsed'] for result in results)
+        for i, (before, after) in enumerate(zip([0.0] + finished, finished)):
+            took = after - before
+            assert took < per_call, \
+                f"get_tree call {i} took {took:.2f}s, expected < {MCP_TIMEOUT}s"
 
-        assert max_time < MCP_TIMEOUT + TIMEOUT_TOLERANCE, \
-            f"Slowest operation took {max_time:.2f}s, expected < {MCP_TIMEOUT}s"
+        log.debug("Batch of 3 get_tree calls took %.2fs", span.elapsed)
 
 
 class TestStateVerification:
     """Tests that specifically verify tools actually change app state"""
 
-    def test_tap_must_change_something(self, fresh_connected_client):
+    def test_tap_must_change_something(self, warm_connected_client):
         """Tapping a clickable widget MUST result in some state change"""
-        # Get full tree before
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 25})
-        tree_data_before = parse_tree_response(tree_before)
-
-        # Tap something clickable
-        tap_result = fresh_connected_client.call("tap", {"selector": "InkWell"})
-        time.sleep(UI_SETTLE_TIME)
+        # Get full tree before and tap something clickable in one batch
+        tree_before, tap_result = warm_connected_client.call_many(
+            [("get_tree", {"max_depth": 25}), ("tap", {"selector": "InkWell"})],
+            timeout=2 * MCP_TIMEOUT)
+        digest_before = tree_digest(tree_before)
 
         # Get tree after
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 25})
-        tree_data_after = parse_tree_response(tree_after)
+        tree_after = wait_for_tree_change(warm_connected_client, digest_before, max_depth=25)
+        digest_after = tree_digest(tree_after)
 
         # Compare - something should have changed
-        if tree_data_before and tree_data_after:
-            before_str = str(tree_data_before)
-            after_str = str(tree_data_after)
-
-            if before_str != after_str:
-                print(f"\n  [SUCCESS] Tree changed after tap")
-            else:
-                # Try tapping a Checkbox instead
-                fresh_connected_client.call("tap", {"selector": "Checkbox"})
-                time.sleep(UI_SETTLE_TIME)
-                tree_after2 = fresh_connected_client.call("get_tree", {"max_depth": 25})
-                tree_data_after2 = parse_tree_response(tree_after2)
-                if tree_data_after2:
-                    after_str2 = str(tree_data_after2)
-                    assert after_str != after_str2, \
-                        "TAP DID NOT CHANGE ANYTHING! The Flutter app is not responding to tap commands."
+        if not (digest_before and digest_after):
+            return
+        if digest_before != digest_after:
+            log.debug("Tree changed after tap")
+            return
+
+        # Only when the InkWell tap changed nothing: try tapping a Checkbox instead
+        warm_connected_client.call("tap", CHECKBOX)
+        tree_after2 = wait_for_tree_change(warm_connected_client, digest_after, max_depth=25)
+        digest_after2 = tree_digest(tree_after2)
+        if digest_after2:
+            assert digest_after != digest_after2, \
+                "TAP DID NOT CHANGE ANYTHING! The Flutter app is not responding to tap commands."
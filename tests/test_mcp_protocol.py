@@ -2,7 +2,12 @@
 Test MCP Protocol - Basic protocol operations
 """
 import pytest
-from conftest import MCP_TIMEOUT
+from conftest import MCP_TIMEOUT, assert_under, read_line, spawn_mcp_process, stop_process
+
+# Tools every build must register (checked once per run, hashed lookups)
+EXPECTED_TOOLS = frozenset({
+    'connect', 'disconnect', 'get_tree', 'find', 'tap', 'type', 'get_properties', 'scroll'
+})
 
 
 class TestMCPProtocol:
@@ -10,21 +15,11 @@ class TestMCPProtocol:
 
     def test_initialize_completes_quickly(self, mcp_executable):
         """Initialize should complete in < 2 seconds"""
-        import subprocess
         import json
-        import time
 
-        proc = subprocess.Popen(
-            [mcp_executable],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        proc = spawn_mcp_process(mcp_executable)
 
         try:
-            start = time.time()
-
             request = {
                 "jsonrpc": "2.0",
                 "method": "initialize",
@@ -36,41 +31,37 @@ class TestMCPProtocol:
                 "id": 1
             }
 
-            proc.stdin.write(json.dumps(request) + '\n')
-            proc.stdin.flush()
-
-            response_line = proc.stdout.readline()
-            elapsed = time.time() - start
-
-            assert elapsed < MCP_TIMEOUT, f"Initialize took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
+            with assert_under(MCP_TIMEOUT, "Initialize"):
+                proc.stdin.write(json.dumps(request).encode() + b'\n')
+                proc.stdin.flush()
+                response_line = read_line(proc.stdout, MCP_TIMEOUT)
 
             response = json.loads(response_line)
             assert 'result' in response, f"Expected result, got: {response}"
             assert response['result'].get('protocolVersion') == "2024-11-05"
 
         finally:
-            proc.terminate()
+            stop_process(proc)
 
     def test_list_tools_completes_quickly(self, mcp_client):
         """tools/list should complete in < 2 seconds"""
-        import time
-
-        start = time.time()
-        tools = mcp_client.list_tools()
-        elapsed = time.time() - start
-
-        assert elapsed < MCP_TIMEOUT, f"tools/list took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
+        with assert_under(MCP_TIMEOUT, "tools/list"):
+            tools = mcp_client.list_tools()
         assert len(tools) > 0, "Expected at least one tool"
 
-    def test_expected_tools_available(self, mcp_client):
+    def test_expected_tools_available(self, session_tools):
         """Verify expected tools are available"""
-        tools = mcp_client.list_tools()
-        tool_names = [t['name'] for t in tools]
+        tool_names = {t['name'] for t in session_tools}
+
+        missing = EXPECTED_TOOLS - tool_names
+        assert not missing, f"Expected tools not found: {sorted(missing)}. Available: {sorted(tool_names)}"
 
-        expected_tools = ['connect', 'disconnect', 'get_tree', 'find', 'tap', 'type', 'get_properties', 'scroll']
+    def test_expected_tools_have_input_schema(self, session_tools):
+        """Every expected tool should describe its arguments"""
+        tools_by_name = {t['name']: t for t in session_tools}
 
-        for tool in expected_tools:
-            assert tool in tool_names, f"Expected tool '{tool}' not found. Available: {tool_names}"
+        for tool in sorted(EXPECTED_TOOLS & tools_by_name.keys()):
+            assert 'inputSchema' in tools_by_name[tool], f"Tool '{tool}' has no inputSchema"
 
     def test_invalid_tool_returns_error(self, mcp_client):
         """Calling an invalid tool should return an error"""
@@ -3,115 +3,93 @@ Test tap Tool - Non-blocking tap operations
 
 Tests verify that tap actually changes widget state.
 """
+import logging
 import pytest
 from conftest import (
-    MCP_TIMEOUT, TIMEOUT_TOLERANCE, UI_SETTLE_TIME, has_error,
-    get_checkbox_state, find_all_widgets, count_widgets, parse_tree_response
+    ADD_BUTTON, CHECKBOX, MCP_TIMEOUT, TIMEOUT_TOLERANCE, assert_under, has_error,
+    get_checkbox_value, get_widget_center, count_matches,
+    wait_for_checkbox_change, wait_for_count_change
 )
-import time
+
+log = logging.getLogger(__name__)
 
 
 class TestTapTool:
     """Test tap tool functionality with non-blocking behavior"""
 
-    def test_tap_by_coordinates_completes_quickly(self, fresh_connected_client):
+    def test_tap_by_coordinates_completes_quickly(self, warm_connected_client):
         """tap by coordinates should complete within timeout"""
-        start = time.time()
-        result = fresh_connected_client.call("tap", {"x": 100, "y": 100})
-        elapsed = time.time() - start
-
-        assert elapsed < MCP_TIMEOUT + TIMEOUT_TOLERANCE, f"tap took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
+        with assert_under(MCP_TIMEOUT + TIMEOUT_TOLERANCE, "tap"):
+            warm_connected_client.call("tap", {"x": 100, "y": 100})
 
-    def test_tap_by_selector_completes_quickly(self, fresh_connected_client):
+    def test_tap_by_selector_completes_quickly(self, warm_connected_client):
         """tap by selector should complete within timeout"""
-        start = time.time()
-        result = fresh_connected_client.call("tap", {"selector": "ElevatedButton"})
-        elapsed = time.time() - start
+        with assert_under(MCP_TIMEOUT + TIMEOUT_TOLERANCE, "tap"):
+            warm_connected_client.call("tap", ADD_BUTTON)
 
-        assert elapsed < MCP_TIMEOUT + TIMEOUT_TOLERANCE, f"tap took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
-
-    def test_tap_checkbox_actually_changes_state(self, fresh_connected_client):
+    def test_tap_checkbox_actually_changes_state(self, warm_connected_client):
         """CRITICAL: Tap on checkbox MUST change its checked state
 
         Uses coordinate-based tap to reliably test state change verification.
-        The first todo item's checkbox is approximately at (50, 380) in the Flutter app.
+        Taps the center of the checkbox's reported bounds; the inspector does
+        not report bounds yet, so until it does this falls back to the first
+        todo item's checkbox at approximately (50, 380) in the Flutter app.
         """
-        # 1. Get initial tree state
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        # Tree might timeout but we continue - the important test is state change
-        tree_str_before = str(parse_tree_response(tree_before))
-        print(f"\n  [DEBUG] Tree before: {len(tree_str_before)} chars")
-
-        # 2. Tap the first todo checkbox using coordinates
-        # On a typical Windows Flutter window (800x600):
-        # - AppBar ~60px, TextField section ~150px, Action buttons ~50px
-        # - First todo item starts around y=350, checkbox is on left at x~50
-        tap_result = fresh_connected_client.call("tap", {"x": 50, "y": 380})
-        print(f"  [DEBUG] Tap result: {str(tap_result)[:200]}")
-
-        # Check tap completed (may succeed or fail if no widget at coords)
-        if has_error(tap_result):
-            # Try alternate position - middle left of screen where checkboxes typically are
-            tap_result = fresh_connected_client.call("tap", {"x": 50, "y": 350})
-            print(f"  [DEBUG] Retry tap result: {str(tap_result)[:200]}")
-
-        # 3. Wait for UI to settle
-        time.sleep(UI_SETTLE_TIME)
-
-        # 4. Get tree state after tap
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        tree_str_after = str(parse_tree_response(tree_after))
-        print(f"  [DEBUG] Tree after: {len(tree_str_after)} chars")
-
-        # 5. VERIFY SOMETHING CHANGED in the tree
-        # If tap worked, the tree should be different (checkbox state, feedback message, etc.)
-        if tree_str_before and tree_str_after:
-            if tree_str_before != tree_str_after:
-                print(f"  [SUCCESS] Tree changed after tap - state verification passed!")
-            else:
-                print(f"  [INFO] Tree appears unchanged - tap may not have hit a checkbox")
-                # Don't fail - the tap succeeded, just might not have hit the right spot
-        else:
-            print(f"  [INFO] Could not compare trees")
-
-    def test_tap_button_triggers_action(self, fresh_connected_client):
+        # 1. Get initial checkbox state (just that widget, not the whole tree)
+        props_before = warm_connected_client.call("get_properties", CHECKBOX)
+        if has_error(props_before):
+            pytest.skip("No checkboxes found in the app")
+        state_before = get_checkbox_value(props_before)
+        log.debug("Checkbox state before: %s", state_before)
+
+        # 2. Tap the first checkbox using coordinates
+        x, y = get_widget_center(props_before) or (50, 380)
+        tap_result = warm_connected_client.call("tap", {"x": x, "y": y})
+        log.debug("Tap result: %.200r", tap_result)
+        assert not has_error(tap_result), f"Tap at ({x}, {y}) failed: {tap_result}"
+
+        # 3. Wait for UI to settle and 4. get checkbox state after tap
+        state_after = wait_for_checkbox_change(warm_connected_client, state_before)
+        log.debug("Checkbox state after: %s", state_after)
+
+        # 5. VERIFY THE CHECKBOX CHANGED
+        assert state_before is not None, "Could not read checkbox state before tap"
+        assert state_after is not None, "Could not read checkbox state after tap"
+        assert state_before != state_after, \
+            f"Checkbox state unchanged after tap at ({x}, {y}): {state_before}"
+
+    def test_tap_button_triggers_action(self, warm_connected_client):
         """Tap on button should trigger its action (e.g., add todo)"""
         # This test verifies that tapping the add button actually adds a todo
 
-        # 1. Get initial todo count
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        todos_before = count_widgets(tree_before, 'ListTile')  # Todos are typically ListTiles
-        print(f"\n  [DEBUG] Todo count before: {todos_before}")
-
-        # 2. Type some text in the text field first
-        type_result = fresh_connected_client.call("type", {
-            "text": "New test todo item",
-            "selector": "TextField"
-        })
-        time.sleep(UI_SETTLE_TIME)
+        # 1. Get initial todo count (find counts on the server side)
+        [todos_before] = count_matches(warm_connected_client, ['ListTile'])  # Todos are typically ListTiles
+        log.debug("Todo count before: %s", todos_before)
 
-        # 3. Tap add button
-        tap_result = fresh_connected_client.call("tap", {"selector": "ElevatedButton"})
-        time.sleep(UI_SETTLE_TIME)
+        # 2. Type some text in the text field first, then 3. tap add button
+        # The server runs a batch in order and type returns once the text is entered
+        type_result, tap_result = warm_connected_client.call_many([
+            ("type", {"text": "New test todo item", "selector": "TextField"}),
+            ("tap", ADD_BUTTON),
+        ], timeout=2 * MCP_TIMEOUT)
 
-        # 4. Get todo count after
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        todos_after = count_widgets(tree_after, 'ListTile')
-        print(f"  [DEBUG] Todo count after: {todos_after}")
+        # 4. Get todo count after, as soon as the new todo shows up
+        [todos_after] = wait_for_count_change(warm_connected_client, ['ListTile'], [todos_before])
+        log.debug("Todo count after: %s", todos_after)
 
         # Note: This might fail if the button isn't the "add" button
         # The test still passes if we can verify some state change occurred
 
-    def test_tap_requires_coordinates_or_selector(self, fresh_connected_client):
+    def test_tap_requires_coordinates_or_selector(self, warm_connected_client):
         """tap without coordinates or selector should error"""
-        result = fresh_connected_client.call("tap", {})
+        result = warm_connected_client.call("tap", {})
 
         # Error can be in JSON-RPC error or in content
         assert has_error(result), f"Expected error when no coordinates or selector provided, got: {result}"
 
-    def test_tap_nonexistent_selector_returns_error(self, fresh_connected_client):
+    def test_tap_nonexistent_selector_returns_error(self, warm_connected_client):
         """tap on nonexistent widget should return error"""
-        result = fresh_connected_client.call("tap", {"selector": "NonexistentWidget12345"})
+        result = warm_connected_client.call("tap", {"selector": "NonexistentWidget12345"})
 
         # Should return error for nonexistent widget
         assert has_error(result), f"Expected error for nonexistent widget, got: {result}"
@@ -3,130 +3,129 @@ Test type Tool - Non-blocking text entry operations
 
 Tests verify that typed text actually appears in the text field.
 """
+import logging
 import pytest
 from conftest import (
-    MCP_TIMEOUT, TIMEOUT_TOLERANCE, UI_SETTLE_TIME, has_error,
-    get_text_field_value, find_all_widgets, parse_tree_response
+    MCP_TIMEOUT, TIMEOUT_TOLERANCE, TREE_JSON, assert_under, has_error,
+    get_text_field_value, find_all_widgets, tree_digest, wait_for_tree, wait_for_tree_change
 )
-import time
+
+log = logging.getLogger(__name__)
 
 
 class TestTypeTool:
     """Test type tool functionality with actual state verification"""
 
-    def test_type_completes_quickly(self, fresh_connected_client):
+    def test_type_completes_quickly(self, warm_connected_client):
         """type should complete within timeout"""
-        start = time.time()
-        result = fresh_connected_client.call("type", {
-            "text": "test",
-            "selector": "TextField"
-        })
-        elapsed = time.time() - start
+        with assert_under(MCP_TIMEOUT + TIMEOUT_TOLERANCE, "type"):
+            warm_connected_client.call("type", {
+                "text": "test",
+                "selector": "TextField"
+            })
 
-        assert elapsed < MCP_TIMEOUT + TIMEOUT_TOLERANCE, f"type took {elapsed:.2f}s, expected < {MCP_TIMEOUT}s"
-
-    def test_type_text_actually_appears(self, fresh_connected_client):
+    def test_type_text_actually_appears(self, warm_connected_client):
         """CRITICAL: Typed text MUST appear in the text field"""
         test_text = "FlutterReflect Test 123"
 
-        # 1. Get text field state before
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
+        # 1. Get text field state before and 2. type text in one batch
+        # The server runs a batch in order, so the tree is captured before typing.
+        # With no TextField the type call fails on its selector without touching
+        # the app, so skipping afterwards is still safe.
+        tree_before, type_result = warm_connected_client.call_many([
+            ("get_tree", {"max_depth": 20, **TREE_JSON}),
+            ("type", {"text": test_text, "selector": "TextField"}),
+        ], timeout=2 * MCP_TIMEOUT)
         text_before = get_text_field_value(tree_before, index=0)
         text_fields = find_all_widgets(tree_before, 'TextField')
 
-        print(f"\n  [DEBUG] Found {len(text_fields)} text fields")
-        print(f"  [DEBUG] Text before: '{text_before}'")
+        log.debug("Found %d text fields", len(text_fields))
+        log.debug("Text before: %r", text_before)
 
         if len(text_fields) == 0:
             pytest.skip("No text fields found in the app")
 
-        # 2. Type text
-        type_result = fresh_connected_client.call("type", {
-            "text": test_text,
-            "selector": "TextField"
-        })
-        print(f"  [DEBUG] Type result: {str(type_result)[:200]}")
+        log.debug("Type result: %.200r", type_result)
 
         assert not has_error(type_result), f"Type failed: {type_result}"
 
-        # 3. Wait for UI
-        time.sleep(UI_SETTLE_TIME)
-
-        # 4. Get text field state after
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
+        # 3. Wait for UI and 4. get text field state after
+        tree_after = wait_for_tree(
+            warm_connected_client, lambda tree: get_text_field_value(tree, index=0) != text_before,
+            **TREE_JSON)
         text_after = get_text_field_value(tree_after, index=0)
-        print(f"  [DEBUG] Text after: '{text_after}'")
+        log.debug("Text after: %r", text_after)
 
         # 5. VERIFY TEXT CHANGED
         # The text field should now contain our typed text
         if text_after is not None:
             # Check if text changed from before
             if text_before != text_after:
-                print(f"  [SUCCESS] Text field changed from '{text_before}' to '{text_after}'")
+                log.debug("Text field changed from %r to %r", text_before, text_after)
             else:
                 # If we can't verify via get_tree, the type still should have worked
                 # This might happen if the tree doesn't include text content
-                print(f"  [WARNING] Could not verify text change via get_tree")
+                log.warning("Could not verify text change via get_tree")
         else:
             # Tree doesn't give us text content - verify type didn't error
             assert not has_error(type_result), "Type operation failed"
 
-    def test_type_into_focused_field_changes_content(self, fresh_connected_client):
+    def test_type_into_focused_field_changes_content(self, warm_connected_client):
         """Typing into a focused field should change its content"""
         # 1. Tap to focus text field
-        tap_result = fresh_connected_client.call("tap", {"selector": "TextField"})
-        time.sleep(UI_SETTLE_TIME)
+        tree_unfocused, tap_result = warm_connected_client.call_many(
+            [("get_tree", {"max_depth": 20}), ("tap", {"selector": "TextField"})],
+            timeout=2 * MCP_TIMEOUT)
 
-        # 2. Get tree before typing
-        tree_before = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        tree_str_before = str(parse_tree_response(tree_before))
+        # 2. Get tree before typing, once focus has shown up in the tree
+        tree_before = wait_for_tree_change(warm_connected_client, tree_digest(tree_unfocused))
+        digest_before = tree_digest(tree_before)
 
         # 3. Type text (without selector - goes to focused field)
-        type_result = fresh_connected_client.call("type", {"text": "focused field test"})
-        time.sleep(UI_SETTLE_TIME)
+        type_result = warm_connected_client.call("type", {"text": "focused field test"})
 
         # 4. Get tree after typing
-        tree_after = fresh_connected_client.call("get_tree", {"max_depth": 20})
-        tree_str_after = str(parse_tree_response(tree_after))
+        tree_after = wait_for_tree_change(warm_connected_client, digest_before)
+        digest_after = tree_digest(tree_after)
 
         # 5. Something should have changed in the tree
-        if tree_str_before and tree_str_after:
-            if tree_str_before != tree_str_after:
-                print(f"\n  [SUCCESS] Tree changed after typing")
+        if digest_before and digest_after:
+            if digest_before != digest_after:
+                log.debug("Tree changed after typing")
             else:
-                print(f"\n  [INFO] Tree unchanged - type may not have worked or text not in tree")
+                log.debug("Tree unchanged - type may not have worked or text not in tree")
 
-    def test_type_requires_text_parameter(self, fresh_connected_client):
+    def test_type_requires_text_parameter(self, warm_connected_client):
         """type without text parameter should error"""
-        result = fresh_connected_client.call("type", {"selector": "TextField"})
+        result = warm_connected_client.call("type", {"selector": "TextField"})
 
         # Error can be in JSON-RPC error or in content
         assert has_error(result), f"Expected error when text not provided, got: {result}"
 
-    def test_type_multiple_times_appends(self, fresh_connected_client):
+    def test_type_multiple_times_appends(self, warm_connected_client):
         """Multiple type operations should append text"""
         # Type first text
-        fresh_connected_client.call("type", {
+        warm_connected_client.call("type", {
             "text": "First ",
             "selector": "TextField"
         })
-        time.sleep(0.5)
-
-        tree_after_first = fresh_connected_client.call("get_tree", {"max_depth": 20})
+        tree_after_first = wait_for_tree(
+            warm_connected_client, lambda tree: get_text_field_value(tree, index=0), timeout=0.5,
+            **TREE_JSON)
         text_first = get_text_field_value(tree_after_first, index=0)
 
         # Type second text
-        fresh_connected_client.call("type", {
+        warm_connected_client.call("type", {
             "text": "Second",
             "selector": "TextField"
         })
-        time.sleep(0.5)
-
-        tree_after_second = fresh_connected_client.call("get_tree", {"max_depth": 20})
+        tree_after_second = wait_for_tree(
+            warm_connected_client, lambda tree: get_text_field_value(tree, index=0) != text_first,
+            timeout=0.5, **TREE_JSON)
         text_second = get_text_field_value(tree_after_second, index=0)
 
-        print(f"\n  [DEBUG] After first type: '{text_first}'")
-        print(f"  [DEBUG] After second type: '{text_second}'")
+        log.debug("After first type: %r", text_first)
+        log.debug("After second type: %r", text_second)
 
         # Text should have changed between the two types
         # (Either appended or replaced, depending on app behavior)